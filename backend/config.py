@@ -7,6 +7,13 @@ load_dotenv()
 class Settings:
     # Database Configuration
     DATABASE_URL = os.getenv("ASYNC_SQLALCHEMY_DATABASE_URL")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 40))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+    DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", 30))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+    # Compiled-SQL cache entries per engine; SQLAlchemy's default of 500 is shared by every distinct statement shape
+    DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", 1200))
 
     # JWT Authentication
     SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key")
@@ -24,4 +31,10 @@ class Settings:
     # Frontend URL
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
+    # Redis; when set, group memberships are cached there and invalidated across workers
+    REDIS_URL = os.getenv("REDIS_URL")
+
+    # Logging
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
 settings = Settings() 
\ No newline at end of file
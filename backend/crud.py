@@ -1,11 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, exists, func, or_, delete, update, extract, desc
+from sqlalchemy import select, exists, func, or_, delete, update, extract, desc, union_all, literal, and_, case
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 import logging
 
-from typing import Optional, Union
+from typing import Collection, Optional, Union
 from decimal import Decimal, ROUND_HALF_UP
+from datetime import datetime, timezone
 
 import backend.models as models
 from backend.models import (
@@ -17,7 +19,7 @@ from backend.models import (
 )
 import backend.schemas as schemas
 from backend.schemas import UserBase, UserCreate, GroupCreate, BillCreate, PaymentCreate, TransactionCategoryCreate, TransactionCreate, SuggestedPayment, TransactionCategoryUpdate, FriendshipCreate, FriendshipUpdate, GroupInvitationCreate, GroupInvitationUpdate, BillUpdate, GroupFinancialBarSummary, UserFinancialBar
-from backend.security import get_password_hash, verify_password
+from backend.security import get_password_hash_async, verify_and_update_password_async
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +72,27 @@ async def get_user_by_user_id(db: AsyncSession, user_id: int) -> User | None:
     return result.scalars().first()
 
 
+async def get_user_conflicts(db: AsyncSession, email: str, username: Optional[str]) -> tuple[bool, bool]:
+    """
+    Checks in a single query whether an email and/or username are already registered.
+    Returns (email_taken, username_taken).
+    """
+    conditions = [User.email == email]
+    if username:
+        conditions.append(User.username == username)
+
+    stmt = (
+        select(
+            (User.email == email).label("email_taken"),
+            (User.username == username).label("username_taken") if username else literal(False),
+        )
+        .where(or_(*conditions))
+        .limit(2)
+    )
+    rows = (await db.execute(stmt)).all()
+    return any(row[0] for row in rows), any(row[1] for row in rows)
+
+
 async def search_users(db: AsyncSession, query: str, current_user_id: int, limit: int = 10) -> list[User]:
     """
     Search for users by username or email, excluding the current user.
@@ -92,7 +115,7 @@ async def search_users(db: AsyncSession, query: str, current_user_id: int, limit
 
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
 
     db_user = User(
         email=user.email,
@@ -101,35 +124,11 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
         hashed_password=hashed_password
     )
 
-    try:
-        db.add(db_user)
-        await db.commit()
-        await db.refresh(db_user)
-        return db_user
-
-    except IntegrityError as e:
-        # Likely duplicate email or username
-        try:
-            await db.rollback()
-        except Exception:
-            pass # Ignore rollback error
-        raise e # Re-raise original IntegrityError
-
-    except SQLAlchemyError as e:
-        # Other potential DB errors during commit/refresh
-        try:
-            await db.rollback()
-        except Exception:
-            pass # Ignore rollback error
-        raise e # Re-raise original SQLAlchemyError
-
-    except Exception as e:
-        # Any other unexpected error
-        try:
-            await db.rollback()
-        except Exception:
-            pass # Ignore rollback error
-        raise e
+    # Errors propagate to the caller; get_db rolls the session back
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
 
 
 async def create_user_from_google(db: AsyncSession, user_info: dict) -> User:
@@ -170,9 +169,21 @@ async def authenticate_user(db: AsyncSession, identifier: str, password: str) ->
     if user is None:
         return None
 
+    # End the read transaction so the connection goes back to the pool during the hash check
+    await db.commit()
+
     # If user found, check the password (ensure user has a password set)
-    if not user.hashed_password or not verify_password(password, user.hashed_password):
-        return None # Password incorrect or not set (e.g., OAuth user)
+    if not user.hashed_password:
+        return None # Password not set (e.g., OAuth user)
+
+    is_valid, upgraded_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not is_valid:
+        return None
+
+    # Migrate legacy bcrypt hashes to the current scheme
+    if upgraded_hash:
+        user.hashed_password = upgraded_hash
+        await db.commit()
 
     # If user found and password is correct
     return user 
@@ -198,8 +209,7 @@ async def create_group(db: AsyncSession, group_in: GroupCreate, creator_id: int)
         )
         db.add(db_member)
 
-        # Refresh the group instance after successful commit
-        await db.refresh(db_group)
+        # The flush already assigned group_id and the group has no server-side defaults, so no refresh
         return db_group
     except SQLAlchemyError as e:
         raise e
@@ -235,6 +245,13 @@ async def get_bill_categories_for_group(db: AsyncSession, group_id: int) -> list
     return result.scalars().all()
 
 
+async def get_user_group_ids(db: AsyncSession, user_id: int) -> list[int]:
+    """Ids of the groups the user belongs to, without loading the groups."""
+    stmt = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+
 async def get_user_groups(db: AsyncSession, user_id: int) -> list[Group] | None:
     stmt = (
         select(Group)
@@ -273,12 +290,51 @@ async def get_group_member_with_user(
     return result.scalars().first()
 
 
+async def get_group_members_with_users_by_ids(
+    db: AsyncSession,
+    group_id: int,
+    user_ids: Collection[int]
+) -> dict[int, GroupMember]:
+    """
+    Memberships of the given users in the group keyed by user_id, with User joined
+    in the same query. Users who aren't members are absent from the result.
+    """
+    stmt = (
+        select(GroupMember)
+        .where(
+            GroupMember.group_id == group_id,
+            GroupMember.user_id.in_(user_ids)
+        )
+        .options(joinedload(GroupMember.user))
+    )
+    result = await db.execute(stmt)
+    return {membership.user_id: membership for membership in result.scalars()}
+
+
+async def get_member_user_in_group(db: AsyncSession, group_id: int, user_id: int) -> User | None:
+    """
+    Returns the User if they are a member of the group, otherwise None.
+    Membership check and user load in a single query.
+    """
+    stmt = (
+        select(User)
+        .join(GroupMember, GroupMember.user_id == User.user_id)
+        .where(
+            GroupMember.group_id == group_id,
+            GroupMember.user_id == user_id
+        )
+    )
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+
 async def get_group_members(db: AsyncSession, group_id: int) -> list[GroupMember]:
     stmt = (
         select(GroupMember)
         .where(GroupMember.group_id == group_id, GroupMember.left_at == None)
         .options(
-            selectinload(GroupMember.user)
+            # Many-to-one: joining the users keeps this to one query
+            joinedload(GroupMember.user)
         )
     )
 
@@ -322,6 +378,30 @@ async def is_member_of_group(
     return result.scalar_one()
 
 
+async def get_group_membership_status(
+    db: AsyncSession, user_id: int, group_id: int
+) -> tuple[bool, GroupRole | None]:
+    """
+    Checks group existence and membership in a single query.
+    Returns (group_exists, role); role is None when the user is not a member.
+    """
+    stmt = (
+        select(models.Group.group_id, GroupMember.role)
+        .outerjoin(
+            GroupMember,
+            and_(
+                GroupMember.group_id == models.Group.group_id,
+                GroupMember.user_id == user_id
+            )
+        )
+        .where(models.Group.group_id == group_id)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        return False, None
+    return True, row.role
+
+
 async def get_user_role_in_group(
     db: AsyncSession, user_id: int, group_id: int
 ) -> GroupRole | None:
@@ -516,7 +596,12 @@ async def validate_member_ids_in_group(db: AsyncSession, *, user_ids: list[int],
     return count == len(set(user_ids))
 
 
-async def get_bill(db: AsyncSession, bill_id: int) -> Bill | None:
+async def get_bill(db: AsyncSession, bill_id: int, populate_existing: bool = False) -> Bill | None:
+    """
+    Loads a bill with everything the Bill schema needs.
+    Pass populate_existing=True right after writing the bill in this session, so the
+    instance already in the identity map is overwritten instead of refreshed separately.
+    """
     stmt = (
         select(models.Bill)
         .where(models.Bill.bill_id == bill_id)
@@ -528,13 +613,74 @@ async def get_bill(db: AsyncSession, bill_id: int) -> Bill | None:
             selectinload(models.Bill.category)
         )
     )
+    if populate_existing:
+        stmt = stmt.execution_options(populate_existing=True)
     result = await db.execute(stmt)
     return result.scalars().first()
 
 
-async def get_group_bills(db: AsyncSession, group_id: int, skip: int = 0, limit: int = 10) -> list[Bill]:
+async def get_bill_with_requester_role(
+    db: AsyncSession, bill_id: int, user_id: int
+) -> tuple[Bill, GroupRole | None] | None:
+    """
+    Loads a bill (without relationships) and the requester's role in the bill's group in one query.
+    Returns None if the bill doesn't exist; the role is None if the user isn't a member of that group.
+    """
+    stmt = (
+        select(models.Bill, GroupMember.role)
+        .outerjoin(
+            GroupMember,
+            and_(
+                GroupMember.group_id == models.Bill.group_id,
+                GroupMember.user_id == user_id
+            )
+        )
+        .where(models.Bill.bill_id == bill_id)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        return None
+    return row[0], row[1]
+
+
+async def lock_bill_with_requester_role(
+    db: AsyncSession, bill_id: int, group_id: int, user_id: int
+) -> tuple[Bill, GroupRole | None] | None:
+    """
+    Loads a bill of the given group (without relationships) and the requester's role in that group,
+    locking the bill row until the transaction ends so it can't be changed or deleted in between.
+    Returns None if the bill doesn't exist in the group; the role is None if the user isn't a member.
+    """
+    stmt = (
+        select(models.Bill, GroupMember.role)
+        .outerjoin(
+            GroupMember,
+            and_(
+                GroupMember.group_id == models.Bill.group_id,
+                GroupMember.user_id == user_id
+            )
+        )
+        .where(models.Bill.bill_id == bill_id, models.Bill.group_id == group_id)
+        # Exclusive rather than shared: two updaters holding shared locks would deadlock on the UPDATE
+        .with_for_update(of=models.Bill)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        return None
+    return row[0], row[1]
+
+
+async def get_group_bills(
+    db: AsyncSession,
+    group_id: int,
+    skip: int = 0,
+    limit: int = 10,
+    before_bill_id: int | None = None,
+) -> list[Bill]:
     """
     Retrieves all bills for a given group with their initial payments, parts, and related user details.
+    Newest first. When before_bill_id is given, returns the bills that come after it in that order
+    (keyset pagination) and skip is ignored, so deep pages don't scan the rows they skip.
     """
     stmt = (
         select(models.Bill)
@@ -546,10 +692,26 @@ async def get_group_bills(db: AsyncSession, group_id: int, skip: int = 0, limit:
             selectinload(models.Bill.bill_creator),
             selectinload(models.Bill.category)
         )
-        .order_by(models.Bill.created_at.desc())
-        .offset(skip)
+        # bill_id breaks created_at ties so pages never overlap or skip rows
+        .order_by(models.Bill.created_at.desc(), models.Bill.bill_id.desc())
         .limit(limit)
     )
+
+    if before_bill_id is not None:
+        cursor_created_at = (
+            select(models.Bill.created_at)
+            .where(models.Bill.bill_id == before_bill_id, models.Bill.group_id == group_id)
+            .scalar_subquery()
+        )
+        stmt = stmt.where(
+            or_(
+                models.Bill.created_at < cursor_created_at,
+                and_(models.Bill.created_at == cursor_created_at, models.Bill.bill_id < before_bill_id),
+            )
+        )
+    else:
+        stmt = stmt.offset(skip)
+
     result = await db.execute(stmt)
     bills = result.scalars().unique().all()
     return bills
@@ -1011,33 +1173,41 @@ async def get_user_transactions(
     return result.scalars().all()
 
 
-async def get_group_member_ids_and_names(db: AsyncSession, group_id: int) -> list[models.User]:
+# Columns backing schemas.User; rows selected with these are trusted and skip re-validation
+_USER_SCHEMA_COLUMNS = (
+    User.user_id, User.email, User.username, User.full_name, User.profile_image_url, User.is_active
+)
+
+
+def user_to_schema(user: User) -> schemas.User:
+    """Builds the User schema from a loaded row without re-running validation; DB constraints already hold."""
+    return schemas.User.model_construct(
+        **{column.key: getattr(user, column.key) for column in _USER_SCHEMA_COLUMNS}
+    )
+
+
+async def get_group_member_ids_and_names(db: AsyncSession, group_id: int) -> list[schemas.User]:
     stmt = (
-        select(User)
+        select(*_USER_SCHEMA_COLUMNS)
         .join(GroupMember, GroupMember.user_id == User.user_id)
         .where(GroupMember.group_id == group_id)
         .order_by(User.username)
     )
 
     result = await db.execute(stmt)
-    user_models = result.scalars().unique().all()
+    return [schemas.User.model_construct(**row._mapping) for row in result]
 
-    user_schemas = [schemas.User.model_validate(user) for user in user_models]
-    return user_schemas
 
-
-async def get_users_by_ids(db: AsyncSession, user_ids: list[int]) -> list[models.User]:
+async def get_users_by_ids(db: AsyncSession, user_ids: Collection[int]) -> list[schemas.User]:
+    # IN (...) is compiled as one expanding bind parameter, so any id count shares a cached statement
     stmt = (
-        select(User)
+        select(*_USER_SCHEMA_COLUMNS)
         .where(User.user_id.in_(user_ids))
         .order_by(User.username)
     )
 
     result = await db.execute(stmt)
-    user_models = result.scalars().unique().all()
-
-    user_schemas = [schemas.User.model_validate(user) for user in user_models]
-    return user_schemas
+    return [schemas.User.model_construct(**row._mapping) for row in result]
 
 
 async def calculate_user_owed_for_bill(
@@ -1071,49 +1241,96 @@ async def calculate_user_owed_for_bill(
     return total_owed_by_user.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
-async def calculate_group_net_balances(db: AsyncSession, group_id: int) -> dict[int, Decimal]:
-    member_schemas = await get_group_member_ids_and_names(db=db, group_id=group_id)
-    member_ids = [member.user_id for member in member_schemas]
-    if not member_ids:
-        return {}
-    
-    balances: dict[int, Decimal] = {user_id: Decimal("0.00") for user_id in member_ids}
+def _group_ledger(group_id: int, user_id: Optional[int] = None):
+    """
+    Subquery of (user_id, signed amount) legs for every bill and payment in the group;
+    summing them per user gives the net balance. With user_id, only that user's legs.
+    """
+    paid_upfront = (
+        select(InitialPayment.user_id.label("user_id"), (-InitialPayment.amount_paid).label("amount"))
+        .join(Bill, Bill.bill_id == InitialPayment.bill_id)
+        .where(Bill.group_id == group_id)
+    )
+    owed_by_parts = (
+        select(BillPart.user_id.label("user_id"), BillPart.amount_owed.label("amount"))
+        .join(Bill, Bill.bill_id == BillPart.bill_id)
+        .where(
+            Bill.group_id == group_id,
+            Bill.split_method.in_([SplitMethod.equal, SplitMethod.exact]),
+        )
+    )
+    owed_by_items = (
+        select(
+            BillItemSplit.user_id.label("user_id"),
+            (BillItem.unit_price * BillItemSplit.quantity).label("amount"),
+        )
+        .join(BillItem, (BillItem.bill_id == BillItemSplit.bill_id) & (BillItem.item_id == BillItemSplit.item_id))
+        .join(Bill, Bill.bill_id == BillItem.bill_id)
+        .where(Bill.group_id == group_id, Bill.split_method == SplitMethod.item)
+    )
+    paid_out = (
+        select(Payment.payer_id.label("user_id"), (-Payment.amount).label("amount"))
+        .where(Payment.group_id == group_id)
+    )
+    received = (
+        select(Payment.payee_id.label("user_id"), Payment.amount.label("amount"))
+        .where(Payment.group_id == group_id)
+    )
+    if user_id is not None:
+        paid_upfront = paid_upfront.where(InitialPayment.user_id == user_id)
+        owed_by_parts = owed_by_parts.where(BillPart.user_id == user_id)
+        owed_by_items = owed_by_items.where(BillItemSplit.user_id == user_id)
+        paid_out = paid_out.where(Payment.payer_id == user_id)
+        received = received.where(Payment.payee_id == user_id)
+    return union_all(paid_upfront, owed_by_parts, owed_by_items, paid_out, received).subquery()
 
-    # Limit to fetching a large number of bills to ensure balance is correct, but not unlimited
-    bills = await get_group_bills(db=db, group_id=group_id, limit=1000)
-    for bill in bills:
-        # First, subtract amounts for anyone who paid upfront for this bill.
-        initial_payments: list[InitialPayment] = bill.initial_payments
-        for initial_payment in initial_payments:
-            if initial_payment.user_id in balances:
-                balances[initial_payment.user_id] -= initial_payment.amount_paid
 
-        # Determine the unique set of users who are assigned a portion of this bill.
-        bill_participant_ids = {part.user_id for part in bill.bill_parts}
-        for item in bill.items:
-            for split in item.bill_item_splits:
-                bill_participant_ids.add(split.user_id)
+def _group_net_balance_stmt(group_id: int):
+    """
+    One statement yielding (user_id, username, net_amount) for every current member,
+    ordered by username (positive = owes the group, negative = is owed).
+    """
+    ledger = _group_ledger(group_id)
 
-        # Now, only iterate over users who were actually part of this bill's split.
-        for user_id in bill_participant_ids:
-            # Ensure we only process users who are still current members of the group.
-            if user_id in balances:
-                amount_owed = await calculate_user_owed_for_bill(
-                    bill=bill,
-                    user_id=user_id
-                )
-                if amount_owed > Decimal("0.00"):
-                    balances[user_id] += amount_owed
-    
-    # Limit to fetching a large number of payments to ensure balance is correct
-    payments = await get_group_payments(db=db, group_id=group_id, limit=1000)
-    for payment in payments:
-        if payment.payer_id in balances:
-            balances[payment.payer_id] -= payment.amount
-        if payment.payee_id in balances:
-            balances[payment.payee_id] += payment.amount
+    totals = (
+        select(ledger.c.user_id, func.round(func.sum(ledger.c.amount), 2).label("net_amount"))
+        .group_by(ledger.c.user_id)
+        .subquery()
+    )
+
+    return (
+        select(GroupMember.user_id, User.username, totals.c.net_amount)
+        .join(User, User.user_id == GroupMember.user_id)
+        .outerjoin(totals, totals.c.user_id == GroupMember.user_id)
+        .where(GroupMember.group_id == group_id)
+        .order_by(User.username)
+    )
+
+
+def _to_money(amount) -> Decimal:
+    return Decimal(amount or 0).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
-    return balances
+
+async def get_group_net_balance_rows(db: AsyncSession, group_id: int) -> list[tuple[int, Optional[str], Decimal]]:
+    """Net balance per current member as (user_id, username, net_amount), in a single query."""
+    result = await db.execute(_group_net_balance_stmt(group_id))
+    return [(user_id, username, _to_money(net_amount)) for user_id, username, net_amount in result]
+
+
+async def get_user_net_balance_in_group(db: AsyncSession, group_id: int, user_id: int) -> Decimal:
+    """One user's net balance in the group, aggregating only the rows that involve them."""
+    ledger = _group_ledger(group_id, user_id=user_id)
+    net_amount = await db.scalar(select(func.round(func.sum(ledger.c.amount), 2)))
+    return _to_money(net_amount)
+
+
+async def calculate_group_net_balances(db: AsyncSession, group_id: int) -> dict[int, Decimal]:
+    """
+    Net balance per current member (positive = owes the group, negative = is owed).
+    All bills and payments of the group are aggregated in a single SQL statement.
+    """
+    rows = await get_group_net_balance_rows(db=db, group_id=group_id)
+    return {user_id: net_amount for user_id, _, net_amount in rows}
 
 
 # Temp class for payer_id and payee_id storing
@@ -1124,52 +1341,57 @@ class _SuggestedPayment:
         self.amount = amount
 
 
-# Calculate a list of suggested payments to settle all debts within a group
-async def calculate_suggested_settlements(
+def _to_cents(amount: Decimal) -> int:
+    return int((amount * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+# Calculate a list of suggested payments to settle all debts within a group.
+# Pure CPU work on a handful of members, so this is a plain (non-async) function.
+def calculate_suggested_settlements(
     net_balances: dict[int, Decimal]
 ) -> list[_SuggestedPayment]:
-    debtors = {user_id: amount for user_id, amount in net_balances.items() if amount > Decimal("0")}
-    creditors = {user_id: -amount for user_id, amount in net_balances.items() if amount < Decimal("0")}
+    # Work in integer cents; convert back to Decimal only for the returned amounts
+    cents_balances = {user_id: _to_cents(amount) for user_id, amount in net_balances.items()}
 
-    suggested_payments: list[_SuggestedPayment] = []
-
-    # Using lists for easier modification
-    debtor_list = [(uid, amt) for uid, amt in debtors.items()]
-    creditor_list = [(uid, amt) for uid, amt in creditors.items()]
+    # Largest debts and credits first, matched with two pointers
+    debtor_list = sorted(
+        ([uid, cents] for uid, cents in cents_balances.items() if cents > 0),
+        key=lambda entry: entry[1], reverse=True
+    )
+    creditor_list = sorted(
+        ([uid, -cents] for uid, cents in cents_balances.items() if cents < 0),
+        key=lambda entry: entry[1], reverse=True
+    )
 
+    suggested_payments: list[_SuggestedPayment] = []
 
     debtor_idx = 0
     creditor_idx = 0
 
     while debtor_idx < len(debtor_list) and creditor_idx < len(creditor_list):
-        payer_id, amount_owed_by_payer = debtor_list[debtor_idx]
-        payee_id, amount_due_to_payee = creditor_list[creditor_idx]
+        debtor = debtor_list[debtor_idx]
+        creditor = creditor_list[creditor_idx]
 
         # Determine the amount to transfer in this step
-        transfer_amount = min(amount_owed_by_payer, amount_due_to_payee)
-
-        if transfer_amount > Decimal("0.005"): # Avoid tiny (e.g. 0.001) transfers due to precision
-            suggested_payments.append(
-                _SuggestedPayment(
-                    payer_id=payer_id,
-                    payee_id=payee_id,
-                    amount=transfer_amount.quantize(Decimal("0.01"))
-                )
+        transfer_cents = min(debtor[1], creditor[1])
+        suggested_payments.append(
+            _SuggestedPayment(
+                payer_id=debtor[0],
+                payee_id=creditor[0],
+                amount=Decimal(transfer_cents).scaleb(-2)
             )
+        )
 
-            # Update remaining balances
-            new_amount_owed_by_payer = amount_owed_by_payer - transfer_amount
-            new_amount_due_to_payee = amount_due_to_payee - transfer_amount
-
-            debtor_list[debtor_idx] = (payer_id, new_amount_owed_by_payer)
-            creditor_list[creditor_idx] = (payee_id, new_amount_due_to_payee)
+        # Update remaining balances
+        debtor[1] -= transfer_cents
+        creditor[1] -= transfer_cents
 
         # Move to the next debtor if their debt is settled
-        if new_amount_owed_by_payer <= Decimal("0.005"):
+        if debtor[1] == 0:
             debtor_idx += 1
-        
+
         # Move to the next creditor if their credit is fulfilled
-        if new_amount_due_to_payee <= Decimal("0.005"):
+        if creditor[1] == 0:
             creditor_idx += 1
 
     return suggested_payments
@@ -1279,6 +1501,16 @@ async def calculate_balance_between_two_users(
     return u1_owes_u2.quantize(Decimal("1"))
 
 
+def round_settlement_amount(balance: Decimal) -> Decimal:
+    """
+    Rounds a whole-unit balance half-up (away from zero) to the nearest thousand,
+    using integer arithmetic.
+    """
+    units = int(balance)
+    rounded = (abs(units) + 500) // 1000 * 1000
+    return Decimal(rounded if units >= 0 else -rounded)
+
+
 async def update_user(
     db: AsyncSession,
     db_user: models.User,
@@ -1321,6 +1553,8 @@ async def create_notification(
     """
     db_notification = models.Notification(
         recipient_user_id=recipient_user_id,
+        # Set here rather than left to the server default so the row is complete once flushed
+        created_at=datetime.now(timezone.utc),
         message=message,
         notification_type=notification_type,
         related_group_id=related_group_id,
@@ -1330,18 +1564,36 @@ async def create_notification(
     )
 
     db.add(db_notification)
+    await db.execute(
+        update(User)
+        .where(User.user_id == recipient_user_id)
+        .values(unread_notification_count=User.unread_notification_count + 1)
+    )
     return db_notification
 
 
+def _decrement_unread_count(user_id: int, by):
+    """UPDATE lowering a user's unread counter, never below zero."""
+    remaining = User.unread_notification_count - by
+    return (
+        update(User)
+        .where(User.user_id == user_id)
+        .values(unread_notification_count=case((remaining > 0, remaining), else_=0))
+    )
+
+
 async def get_notifications_for_user(
     db: AsyncSession,
     user_id: int,
     skip: int = 0,
     limit: int = 20, # Default limit for listing
-    unread_only: bool = False
+    unread_only: bool = False,
+    before_id: int | None = None,
 ) -> list[Notification]:
     """
     Retrieves notifications for a specific user, with pagination and unread filter.
+    Newest first. When before_id is given, returns the notifications that come after it in that order
+    (keyset pagination) and skip is ignored, so deep pages don't scan the rows they skip.
     """
     stmt = (
         select(models.Notification)
@@ -1354,7 +1606,23 @@ async def get_notifications_for_user(
     if unread_only:
         stmt = stmt.where(models.Notification.is_read == False)
 
-    stmt = stmt.order_by(models.Notification.created_at.desc()).offset(skip).limit(limit)
+    # id breaks created_at ties so pages never overlap or skip rows
+    stmt = stmt.order_by(models.Notification.created_at.desc(), models.Notification.id.desc()).limit(limit)
+
+    if before_id is not None:
+        cursor_created_at = (
+            select(models.Notification.created_at)
+            .where(models.Notification.id == before_id, models.Notification.recipient_user_id == user_id)
+            .scalar_subquery()
+        )
+        stmt = stmt.where(
+            or_(
+                models.Notification.created_at < cursor_created_at,
+                and_(models.Notification.created_at == cursor_created_at, models.Notification.id < before_id),
+            )
+        )
+    else:
+        stmt = stmt.offset(skip)
     
     result = await db.execute(stmt)
     return result.scalars().all()
@@ -1389,11 +1657,22 @@ async def mark_notification_as_read(
     Assumes db_notification is a valid notification for the current user.
     """
     if not db_notification.is_read:
-        db_notification.is_read = True
-
         try:
+            # Conditional on is_read so concurrent marks of the same notification decrement the counter once
+            result = await db.execute(
+                update(models.Notification)
+                .where(
+                    models.Notification.id == db_notification.id,
+                    models.Notification.is_read == False
+                )
+                .values(is_read=True)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                await db.execute(_decrement_unread_count(db_notification.recipient_user_id, 1))
             await db.commit()
-            await db.refresh(db_notification)
+            # Nothing is server-generated, so the loaded row only needs is_read set
+            set_committed_value(db_notification, "is_read", True)
         except SQLAlchemyError as e:
             await db.rollback()
             raise e
@@ -1409,10 +1688,15 @@ async def mark_all_notifications_as_read(db: AsyncSession, user_id: int) -> int:
             models.Notification.is_read == False
         )
         .values(is_read=True)
+        # One UPDATE and nothing else: the caller holds no loaded notifications to sync
+        .execution_options(synchronize_session=False)
     )
 
     try:
         result = await db.execute(stmt)
+        # Lowered by the rows actually flipped, so notifications created concurrently stay counted
+        if result.rowcount:
+            await db.execute(_decrement_unread_count(user_id, result.rowcount))
         await db.commit()
         return result.rowcount
     
@@ -1421,21 +1705,73 @@ async def mark_all_notifications_as_read(db: AsyncSession, user_id: int) -> int:
         raise e
     
 
-async def get_unread_notification_count(db: AsyncSession, user_id: int) -> int:
-    """Gets the count of unread notifications for a user."""
+async def get_notifications_page_for_user(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    unread_only: bool = False
+) -> tuple[list[Notification], int]:
+    """
+    A page of the user's notifications plus their total unread count.
+    The count is read from the same counter as get_unread_notification_count, as a
+    scalar subquery, so both come from one query.
+    """
+    unread_total = (
+        select(User.unread_notification_count)
+        .where(User.user_id == user_id)
+        .scalar_subquery()
+    )
     stmt = (
-        select(func.count(models.Notification.id))
-        .where(
-            models.Notification.recipient_user_id == user_id,
-            models.Notification.is_read == False
+        select(models.Notification, unread_total.label("unread_total"))
+        .where(models.Notification.recipient_user_id == user_id)
+        .options(
+            joinedload(models.Notification.recipient)
         )
     )
 
+    if unread_only:
+        stmt = stmt.where(models.Notification.is_read == False)
+
+    # id breaks created_at ties so offset pages never overlap or skip rows
+    stmt = stmt.order_by(models.Notification.created_at.desc(), models.Notification.id.desc()).offset(skip).limit(limit)
+
+    rows = (await db.execute(stmt)).all()
+    if rows:
+        return [row.Notification for row in rows], int(rows[0].unread_total or 0)
+    # An empty page has no row to carry the count
+    return [], await get_unread_notification_count(db, user_id=user_id)
+
+
+async def get_unread_notification_count(db: AsyncSession, user_id: int) -> int:
+    """Gets the count of unread notifications for a user from the counter on their row."""
+    stmt = select(User.unread_notification_count).where(User.user_id == user_id)
+
     result = await db.execute(stmt)
     count = result.scalar_one_or_none()
     return count if count is not None else 0
 
 
+async def get_notification_state(db: AsyncSession, user_id: int) -> tuple[int, int]:
+    """
+    Returns (latest notification id, unread count) for a user in one round-trip.
+    Notifications are only ever inserted or marked read, so the pair changes whenever
+    anything the user's notification listings show does.
+    """
+    latest_id = (
+        select(func.max(models.Notification.id))
+        .where(models.Notification.recipient_user_id == user_id)
+        .scalar_subquery()
+    )
+    stmt = select(User.unread_notification_count, latest_id).where(User.user_id == user_id)
+
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        return 0, 0
+    unread_count, latest_id = row
+    return latest_id or 0, unread_count or 0
+
+
 async def get_recent_member_joins_for_activity(
     db: AsyncSession, group_id: int, limit: int = 10
 ) -> list[models.GroupMember]:
@@ -1545,33 +1881,10 @@ async def create_audit_log_entry(
         summary_message=summary_message
     )
 
+    # Does not commit or flush: the row is written with the caller's other changes on its commit
     db.add(db_log_entry)
-    try:
-        await db.commit()
-        await db.refresh(db_log_entry)
-        return db_log_entry
+    return db_log_entry
 
-    except IntegrityError as e:
-        try:
-            await db.rollback()
-        except Exception:
-            pass
-        raise e
-    
-    except SQLAlchemyError as e:
-        try:
-            await db.rollback()
-        except Exception:
-            pass
-        raise e
-    
-    except Exception as e:
-        try:
-            await db.rollback()
-        except Exception:
-            pass
-        raise e
-    
 
 async def get_group_audit_log_entries(
     db: AsyncSession, 
@@ -1580,12 +1893,16 @@ async def get_group_audit_log_entries(
     limit: int = 20
 ) -> list[models.AuditLogEntry]:
     """
-    Retrieves paginated audit log entries for a specific group, ordered by most recent.
+    Retrieves paginated audit log entries for a specific group, ordered by most recent,
+    with the actor and target users joined in.
     """
     stmt = (
         select(models.AuditLogEntry)
         .where(models.AuditLogEntry.group_id == group_id)
-        .options(joinedload(models.AuditLogEntry.actor))
+        .options(
+            joinedload(models.AuditLogEntry.actor),
+            joinedload(models.AuditLogEntry.target_user)
+        )
         .order_by(models.AuditLogEntry.timestamp.desc())
         .offset(skip)
         .limit(limit)
@@ -1650,18 +1967,19 @@ async def delete_transaction(
 
 
 async def update_group(
-    db: AsyncSession, group_id: int, group_update: schemas.GroupUpdate
+    db: AsyncSession, group_id: int, update_data: dict
 ) -> models.Group | None:
+    """Applies update_data, the caller's GroupUpdate dumped with exclude_unset=True."""
     db_group = await get_group(db, group_id)
     if not db_group:
         return None
-    
-    update_data = group_update.model_dump(exclude_unset=True)
+
     for key, value in update_data.items():
         setattr(db_group, key, value)
-        
-    await db.commit()
-    await db.refresh(db_group)
+
+    # Only plain columns change and nothing is server-generated, so the loaded
+    # object is already current; the caller commits together with its audit entry
+    await db.flush()
     return db_group
 
 
@@ -1741,6 +2059,31 @@ async def can_send_friend_request(db: AsyncSession, user_id_1: int, user_id_2: i
     return True
 
 
+async def get_friend_request_preconditions(
+    db: AsyncSession, requester_id: int, addressee_id: int
+) -> tuple[bool, bool]:
+    """
+    Checks in a single query whether the addressee exists and whether a friendship
+    (pending or accepted, in either direction) already links the two users.
+    Returns (addressee_exists, friendship_exists).
+    """
+    friendship_exists = exists().where(
+        or_(
+            (Friendship.requester_id == requester_id) & (Friendship.addressee_id == addressee_id),
+            (Friendship.requester_id == addressee_id) & (Friendship.addressee_id == requester_id)
+        )
+    )
+    stmt = (
+        select(friendship_exists.label("friendship_exists"))
+        .select_from(User)
+        .where(User.user_id == addressee_id)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        return False, False
+    return True, bool(row.friendship_exists)
+
+
 async def get_friendships_for_user(db: AsyncSession, user_id: int) -> list[Friendship]:
     stmt = (
         select(Friendship)
@@ -1793,13 +2136,17 @@ async def get_sent_pending_friend_requests(db: AsyncSession, user_id: int) -> li
 
 
 async def update_friendship(db: AsyncSession, db_friendship: Friendship, friendship_up: FriendshipUpdate) -> Friendship:
-    """Updates the status of a friendship to ACCEPTED. Does not commit."""
+    """
+    Updates the status of a friendship to ACCEPTED. Does not commit.
+    Expects db_friendship from get_friendship_by_users, which already loads requester/addressee.
+    """
     # This function now only handles accepting friendships.
     # Declining is handled by delete_friendship.
     if friendship_up.status == FriendshipStatus.accepted:
         db_friendship.status = FriendshipStatus.accepted
+        # Set here rather than via the column's onupdate, which would expire it and force a re-select
+        db_friendship.updated_at = datetime.now(timezone.utc)
         await db.flush()
-    await db.refresh(db_friendship, attribute_names=['requester', 'addressee'])
     return db_friendship
 
 
@@ -1822,9 +2169,8 @@ async def create_group_invitation(db: AsyncSession, inv_in: GroupInvitationCreat
         invitee_id=inv_in.invitee_id,
         status=GroupInvitationStatus.pending
     )
+    # Flushed with the caller's other changes; invitation_id is assigned then
     db.add(db_invitation)
-    await db.flush()
-    await db.refresh(db_invitation)
     return db_invitation
 
 
@@ -1861,26 +2207,42 @@ async def get_pending_invitations_for_user(db: AsyncSession, user_id: int) -> li
     return result.scalars().unique().all()
 
     
-async def update_group_invitation(db: AsyncSession, db_invitation: GroupInvitation, inv_up: GroupInvitationUpdate) -> GroupInvitation:
-    """Updates the status of a group invitation. Does not commit."""
-    db_invitation.status = inv_up.status
-    db.add(db_invitation) # Add to session to track changes
-    
+async def update_group_invitation(db: AsyncSession, db_invitation: GroupInvitation, inv_up: GroupInvitationUpdate) -> bool:
+    """
+    Moves a pending invitation to inv_up.status; on acceptance the invitee joins the group. Does not commit.
+    Returns False, changing nothing, if the invitation is no longer pending.
+    Expects db_invitation as loaded by get_group_invitation_by_id: the response is built from it without re-reading.
+    """
+    now = datetime.now(timezone.utc)
+    # Conditional on status so two concurrent responses can't both go through
+    result = await db.execute(
+        update(GroupInvitation)
+        .where(
+            GroupInvitation.invitation_id == db_invitation.invitation_id,
+            GroupInvitation.status == GroupInvitationStatus.pending
+        )
+        .values(status=inv_up.status, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        return False
+    set_committed_value(db_invitation, "status", inv_up.status)
+    set_committed_value(db_invitation, "updated_at", now)
+
     # If the invitation is accepted, add the user to the group
     if inv_up.status == GroupInvitationStatus.accepted:
-        # Check if user is already a member to avoid errors
-        is_member = await is_member_of_group(db, user_id=db_invitation.invitee_id, group_id=db_invitation.group_id)
-        if not is_member:
-            await add_user_to_group(
-                db=db,
+        group = db_invitation.group
+        # The group's members are already loaded; no query needed to check membership
+        if not any(member.user_id == db_invitation.invitee_id for member in group.members):
+            group.members.append(GroupMember(
                 group_id=db_invitation.group_id,
                 user_id=db_invitation.invitee_id,
-                role=GroupRole.member # Default role for accepted invites
-            )
-            
-    await db.flush()
-    await db.refresh(db_invitation)
-    return db_invitation
+                role=GroupRole.member, # Default role for accepted invites
+                joined_at=now,
+                user=db_invitation.invitee
+            ))
+
+    return True
 
 
 async def get_pending_invitations_for_group(db: AsyncSession, group_id: int) -> list[GroupInvitation]:
@@ -1959,6 +2321,42 @@ async def get_group_payments(
     return result.scalars().all()
 
 
+async def get_group_invitation_preconditions(
+    db: AsyncSession, group_id: int, inviter_id: int, invitee_id: int
+) -> tuple[GroupRole | None, User | None, bool, GroupInvitation | None]:
+    """
+    Everything send_group_invitation checks before writing, in a single query when the invitee exists.
+    Returns (inviter_role, invitee, invitee_is_member, existing_invitation).
+    """
+    inviter_role = (
+        select(GroupMember.role)
+        .where(GroupMember.group_id == group_id, GroupMember.user_id == inviter_id)
+        .scalar_subquery()
+    )
+    invitee_is_member = exists().where(
+        GroupMember.group_id == group_id, GroupMember.user_id == invitee_id
+    )
+    stmt = (
+        select(
+            inviter_role.label("inviter_role"),
+            User,
+            invitee_is_member.label("invitee_is_member"),
+            GroupInvitation,
+        )
+        .select_from(User)
+        .outerjoin(
+            GroupInvitation,
+            and_(GroupInvitation.group_id == group_id, GroupInvitation.invitee_id == User.user_id)
+        )
+        .where(User.user_id == invitee_id)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        # No invitee row to hang the subqueries on; the role still decides 403 vs 404
+        return await get_user_role_in_group(db, user_id=inviter_id, group_id=group_id), None, False, None
+    return row.inviter_role, row.User, bool(row.invitee_is_member), row.GroupInvitation
+
+
 async def get_invitation_by_group_and_invitee(db: AsyncSession, group_id: int, invitee_id: int) -> GroupInvitation | None:
     """Gets an invitation for a specific user in a specific group, regardless of status."""
     stmt = select(GroupInvitation).where(
@@ -1996,8 +2394,8 @@ async def get_user_by_google_id(db: AsyncSession, google_id: str) -> Optional[Us
 
 
 async def get_group_member(db: AsyncSession, group_id: int, user_id: int) -> models.GroupMember | None:
-    result = await db.execute(select(models.GroupMember).filter_by(group_id=group_id, user_id=user_id))
-    return result.scalars().first()
+    # Primary-key lookup: a membership already loaded in this session is returned without a query
+    return await db.get(models.GroupMember, (group_id, user_id))
 
 
 async def update_member_role(db: AsyncSession, group_id: int, user_id: int, new_role: models.GroupRole) -> models.GroupMember | None:
@@ -2006,9 +2404,8 @@ async def update_member_role(db: AsyncSession, group_id: int, user_id: int, new_
     """
     member = await get_group_member(db, group_id=group_id, user_id=user_id)
     if member:
+        # Flushed on the caller's commit together with its audit entry
         member.role = new_role
-        await db.flush()
-        await db.refresh(member)
     return member
 
 
@@ -2026,10 +2423,7 @@ async def swap_owner_with_admin(db: AsyncSession, group_id: int, current_owner_i
     # Swap roles
     current_owner_membership.role = models.GroupRole.admin
     new_owner_membership.role = models.GroupRole.owner
-    
-    await db.flush()
-    await db.refresh(new_owner_membership)
-    await db.refresh(current_owner_membership)
+    # Both role changes are flushed on the caller's commit together with its audit entries
 
     return new_owner_membership
 
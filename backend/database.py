@@ -1,14 +1,18 @@
 # from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from dotenv import load_dotenv
 import os
+import logging
 from typing import Annotated, AsyncGenerator
 from fastapi import Depends, HTTPException, status
+from backend.config import settings
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Get database configuration from environment variables
 ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_SQLALCHEMY_DATABASE_URL")
 if not ASYNC_SQLALCHEMY_DATABASE_URL:
@@ -21,39 +25,56 @@ try:
     engine = create_async_engine(
         ASYNC_SQLALCHEMY_DATABASE_URL,
         echo=False,  # Set to True for SQL query logging
-        pool_pre_ping=True,  # Enable connection health checks
-        pool_size=5,  # Adjust based on your needs
-        max_overflow=10
+        # Recycling connections well before MySQL's wait_timeout replaces a ping on every checkout;
+        # enable DB_POOL_PRE_PING when a proxy in front of MySQL drops idle connections sooner
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        # Every crud query uses bound parameters, so repeated calls reuse the compiled SQL from this cache
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
     )
 except Exception as e:
     raise ValueError(f"Failed to create database engine: {str(e)}")
 
+# A sync driver here would block the event loop on every query
+if not engine.dialect.is_async:
+    raise ValueError(
+        f"ASYNC_SQLALCHEMY_DATABASE_URL must use an async driver (e.g. mysql+aiomysql), got '{engine.dialect.driver}'"
+    )
+
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
-# Base class for SQLAlchemy models
-Base = declarative_base()
+# Base class for SQLAlchemy models (2.0-style declarative base)
+class Base(DeclarativeBase):
+    pass
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency for getting async database sessions."""
+    """
+    Dependency for getting async database sessions.
+    This is the single rollback point for request handlers: any exception raised
+    while the session is in use rolls back the open transaction here.
+    """
     async with AsyncSessionLocal() as session:
         try:
             yield session
         except HTTPException: # If it's already an HTTPException, let it pass through
+            if session.in_transaction():
+                await session.rollback()
             raise
         except Exception as e:
             # For other exceptions, rollback and raise a generic DB error
-            # Consider adding: import logging; logger = logging.getLogger(__name__); logger.error(f"Unhandled DB session error: {e}", exc_info=True)
+            logger.error(f"Unhandled error during database session: {e}", exc_info=True)
             await session.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="A database session error occurred." # Updated detail message
             ) from e
-        finally:
-            await session.close()
 
 # Typed dependency for use in route functions
 DbSessionDep = Annotated[AsyncSession, Depends(get_db)]
\ No newline at end of file
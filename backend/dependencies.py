@@ -1,23 +1,78 @@
+import hashlib
+import time
 from typing import Annotated
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status, Path
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import JWTError, jwt
+from sqlalchemy.orm import make_transient_to_detached
+from jose import JWTError
 from fastapi.security import HTTPAuthorizationCredentials
 
 # Import necessary components FROM OTHER MODULES
-from backend.security import SECRET_KEY, ALGORITHM, oauth2_scheme, bearer_scheme # Import JWT stuff & scheme
+from backend.security import oauth2_scheme, bearer_scheme, decode_access_token # Import JWT stuff & scheme
 from backend.database import DbSessionDep # Import DB dependency alias
 from backend.crud import (
-    get_user_by_user_id, get_group, is_member_of_group, validate_member_ids_in_group,
-    get_bill, get_user_role_in_group, get_payment
+    get_user_by_user_id, get_group_membership_status, validate_member_ids_in_group,
+    get_user_role_in_group, get_payment
 )
 from backend.schemas import TokenData, User, BillCreate, BillUpdate
-from backend.models import SplitMethod, Bill, GroupRole, Payment
+from backend.models import SplitMethod, GroupRole, Payment
+from backend.services.membership_cache import (
+    cache_role, get_cached_role, on_user_invalidated, publish_user_invalidation
+)
+import backend.models as models
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Token digest -> (user_id, token exp, column snapshot of the user row).
+# Kept short so other workers' profile changes show up quickly when there's no Redis to announce them.
+_USER_CACHE_TTL_SECONDS = 60
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=_USER_CACHE_TTL_SECONDS)
+_USER_COLUMNS = tuple(column.key for column in sa_inspect(models.User).column_attrs)
+
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+def _drop_cached_user(user_id: int | None) -> None:
+    if user_id is None:
+        _user_cache.clear()
+        return
+    stale_keys = [key for key, (cached_id, _, _) in list(_user_cache.items()) if cached_id == user_id]
+    for key in stale_keys:
+        _user_cache.pop(key, None)
+
+
+# Other workers' changes arrive over the membership cache's invalidation channel when Redis is configured
+on_user_invalidated(_drop_cached_user)
+
+
+async def invalidate_cached_user(user_id: int) -> None:
+    """Drops cached lookups for a user after their row changes, in every worker."""
+    _drop_cached_user(user_id)
+    await publish_user_invalidation(user_id)
+
+
+async def _get_cached_user(db: AsyncSession, cache_key: bytes) -> models.User | None:
+    entry = _user_cache.get(cache_key)
+    if entry is None:
+        return None
+
+    _, token_exp, snapshot = entry
+    if token_exp is not None and token_exp <= time.time():
+        _user_cache.pop(cache_key, None)
+        return None
+
+    # Attach the snapshot to this request's session without a SELECT
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
 # async def get_current_user(
 #     token: Annotated[str, Depends(oauth2_scheme)],
 #     db: DbSessionDep,
@@ -59,8 +114,13 @@ async def get_current_user(
 
     token = http_auth.credentials # Get the token string
 
+    cache_key = _token_cache_key(token)
+    cached_user = await _get_cached_user(db, cache_key)
+    if cached_user is not None:
+        return cached_user
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         subject: str | None = payload.get("sub")
         if subject is None:
             raise credentials_exception
@@ -77,89 +137,54 @@ async def get_current_user(
     user = await get_user_by_user_id(db, user_id=user_id)
     if user is None:
         raise credentials_exception
+
+    snapshot = {column: getattr(user, column) for column in _USER_COLUMNS}
+    _user_cache[cache_key] = (user.user_id, payload.get("exp"), snapshot)
     return user
 
 
-async def validate_group_member(
-    db: DbSessionDep,
-    current_user: User = Depends(get_current_user),
-    group_id: int = Path(...),
-):
-    db_group = await get_group(db=db, group_id=group_id)
-    if db_group is None:
+async def _read_group_role(db: AsyncSession, user_id: int, group_id: int) -> GroupRole:
+    # Existence and membership in one round-trip
+    group_exists, role = await get_group_membership_status(
+        db=db, user_id=user_id, group_id=group_id
+    )
+    if not group_exists:
         logger.warning(f"Group {group_id} not found.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
     
-    is_member = await is_member_of_group(db=db, user_id=current_user.user_id, group_id=group_id)
-    if not is_member:
-        logger.warning(f"User {current_user.user_id} forbidden access to group {group_id}.")
+    if role is None:
+        logger.warning(f"User {user_id} forbidden access to group {group_id}.")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this group")
-        
 
-async def get_validated_bill_for_group(
-    db: DbSessionDep,
-    bill_id: int = Path(..., description="The ID of the bill"),
-    group_id: int = Path(..., description="The ID of the group from the path"),
-) -> Bill:
-    db_bill = await get_bill(db=db, bill_id=bill_id)
-    if not db_bill:
-        logger.warning(f"Validation failed: Bill {bill_id} not found.")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bill not found")
-
-    if db_bill.group_id != group_id:
-        logger.warning(
-            f"Validation failed: Bill {bill_id} belongs to group {db_bill.group_id}, "
-            f"but access was attempted via group path {group_id}."
-        )
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bill does not belong to the specified group or was not found."
-        )
-    return db_bill
+    await cache_role(group_id, user_id, role)
+    return role
 
 
-# Check if user is in group and has authority to modify a specific bill
-async def authorize_bill_operation(
+async def validate_group_member(
     db: DbSessionDep,
-    db_bill: Bill = Depends(get_validated_bill_for_group),
     current_user: User = Depends(get_current_user),
-) -> None:
-    requester_user_id = current_user.user_id
-    bill_group_id = db_bill.group_id
-
-    # Check if user is in group
-    requester_role = await get_user_role_in_group(
-        db=db, user_id=requester_user_id, group_id=bill_group_id
-    )
-
-    if requester_role is None:
-        logger.warning(
-            f"Authorization failed for bill {db_bill.bill_id}: User {requester_user_id} "
-            f"not found or has no role in bill's group {bill_group_id}."
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User not authorized for the bill's group or role indeterminate."
-        )
+    group_id: int = Path(...),
+) -> GroupRole:
+    # current_user comes from FastAPI's per-request dependency cache, so the token
+    # is decoded once; the membership then costs one round-trip, or none while cached.
+    # Returns the member's role; dependants reuse it from the same per-request cache.
+    # The cached role may lag a removal or demotion by up to its TTL, so this is for
+    # read-only routes; routes that write use validate_group_member_for_write.
+    role = await get_cached_role(group_id, current_user.user_id)
+    if role is not None:
+        return role
+    return await _read_group_role(db, current_user.user_id, group_id)
 
-    # Authorization Check: Bill creator or owner/admin can modify bill
-    is_bill_creator = (db_bill.created_by == requester_user_id)
-    is_group_owner_or_admin = requester_role in {
-        GroupRole.owner,
-        GroupRole.admin
-    }
 
-    if not (is_bill_creator or is_group_owner_or_admin):
-        logger.warning(
-            f"Authorization failed for bill {db_bill.bill_id}: User {requester_user_id} "
-            f"(role: {requester_role.value if hasattr(requester_role, 'value') else requester_role}) "
-            f"is not bill creator ({db_bill.created_by}) nor group owner/admin."
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to perform this operation on the bill."
-        )
-    
+async def validate_group_member_for_write(
+    db: DbSessionDep,
+    current_user: User = Depends(get_current_user),
+    group_id: int = Path(...),
+) -> GroupRole:
+    # Same checks as validate_group_member, but always against the database, so a
+    # member removed or demoted on another instance is refused straight away.
+    return await _read_group_role(db, current_user.user_id, group_id)
+        
 
 async def get_validated_payment_for_group(
     db: DbSessionDep,
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Request, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from contextlib import asynccontextmanager
@@ -10,8 +11,12 @@ import os
 import logging
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
 import google.generativeai as genai
 from backend.config import settings
+from backend.services.membership_cache import start_membership_cache, stop_membership_cache
+from backend.services.notification_stream import start_notification_stream, stop_notification_stream
 
 # Load environment variables from .env file at the very beginning
 load_dotenv()
@@ -29,7 +34,7 @@ from backend.routers import (
 from backend.database import engine, Base
 
 logging.basicConfig(
-    level=logging.INFO,
+    level=settings.LOG_LEVEL,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 # Quieten down noisy libraries
@@ -59,13 +64,35 @@ async def lifespan(app: FastAPI):
     else:
         logger.warning("GOOGLE_API_KEY not found. Receipt parsing feature will be unavailable.")
     
-    # Initialize FastAPI Cache
-    FastAPICache.init(InMemoryBackend(), prefix="fastapi-cache")
+    # Warm Google OAuth discovery/JWKS so the first login doesn't pay for them
+    if settings.GOOGLE_CLIENT_ID:
+        await auth.prefetch_google_oauth_metadata()
+
+    # One Redis client (and connection pool) for the cache backend, the membership cache
+    # and the notification streams
+    redis = aioredis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
+
+    # Initialize FastAPI Cache. With Redis it is shared by every instance, so an
+    # invalidation on one is seen by all; in memory it's per process.
+    if redis is not None:
+        FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix="fastapi-cache")
     logger.info("FastAPI cache initialized.")
+
+    if redis is not None:
+        await start_membership_cache(redis)
+        logger.info("Shared membership cache enabled.")
+        await start_notification_stream(redis)
+        logger.info("Notification streams fan out through Redis.")
     
     yield
     
     logger.info("--- Shutting down application ---")
+    await stop_membership_cache()
+    await stop_notification_stream()
+    if redis is not None:
+        await redis.close()
 
 
 # Create the main FastAPI instance
@@ -73,7 +100,8 @@ app = FastAPI(
     title="Group Payment API",
     version="0.1.0",
     description="A secure API for managing group payments and expenses",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # --- CORS Middleware Configuration ---
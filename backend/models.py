@@ -1,16 +1,25 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, DateTime, func, Enum as SqlEnum
-from sqlalchemy import CheckConstraint, UniqueConstraint, ForeignKeyConstraint, Date, Text, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, DateTime, func, text, Enum as SqlEnum
+from sqlalchemy import CheckConstraint, UniqueConstraint, ForeignKeyConstraint, Date, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 
 # IMPORTANT: Import the Base from your database setup file!
 from backend.database import Base
 from enum import Enum as PyEnum
+from types import MappingProxyType
 
 class GroupRole(PyEnum):
     owner = "owner"
     admin = "admin"
     member = "member"
-    
+
+    @property
+    def rank(self) -> int:
+        """Higher ranks outrank lower ones: owner > admin > member."""
+        return _GROUP_ROLE_RANK[self]
+
+
+_GROUP_ROLE_RANK = MappingProxyType({GroupRole.owner: 2, GroupRole.admin: 1, GroupRole.member: 0})
+
 
 # Define your first table as a Python class
 class User(Base):
@@ -31,6 +40,8 @@ class User(Base):
     profile_image_url = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_active = Column(Boolean, default=True)
+    # Counter cache kept in step with notifications.is_read by the notification crud functions
+    unread_notification_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
 
     # Example relationship (optional for now)
     memberships = relationship("GroupMember", back_populates="user", cascade="all, delete-orphan")
@@ -57,6 +68,11 @@ class User(Base):
 
     transactions = relationship("Transaction", back_populates="user")
 
+    @property
+    def display_name(self) -> str | None:
+        """Name shown to other users, e.g. in notification messages."""
+        return self.full_name or self.username
+
 
 # Define another table
 class Group(Base):
@@ -113,6 +129,10 @@ class BillCategory(Base):
 
 class Bill(Base):
     __tablename__ = "bills"
+    __table_args__ = (
+        # Group bill list is paged newest first by (created_at, bill_id)
+        Index('ix_bills_group_created_at_bill_id', 'group_id', 'created_at', 'bill_id'),
+    )
 
     bill_id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("users_groups.group_id", ondelete="CASCADE"), nullable=False)
@@ -230,7 +250,7 @@ class Payment(Base):
     payee_id = Column(Integer, ForeignKey('users.user_id', ondelete="RESTRICT"))
     bill_id = Column(Integer, ForeignKey('bills.bill_id', ondelete="SET NULL"), nullable=True)
     
-    payment_date = Column(Date, nullable=False, default=func.now())
+    payment_date = Column(Date, nullable=False, server_default=text("(CURRENT_DATE)"))
     notes = Column(Text, nullable=True)
     amount = Column(Numeric(10, 2), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -277,7 +297,7 @@ class Transaction(Base):
     category_id = Column(Integer, ForeignKey('transaction_categories.category_id', ondelete="SET NULL"), nullable=True)
     
     amount = Column(Numeric(10, 2), nullable=False)
-    transaction_date = Column(Date, nullable=False, default=func.now())
+    transaction_date = Column(Date, nullable=False, server_default=text("(CURRENT_DATE)"))
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -299,10 +319,16 @@ class NotificationType(PyEnum): # Optional: If you want to categorize notificati
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # A user's notifications are paged newest first
+        Index('ix_notifications_recipient_created', 'recipient_user_id', 'created_at'),
+        # Unread listing, and the unread count read from the index alone
+        Index('ix_notifications_recipient_read_created', 'recipient_user_id', 'is_read', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
-    recipient_user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    recipient_user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -377,7 +403,7 @@ class AuditLogEntry(Base):
     # group = relationship("Group")
     # target_bill = relationship("Bill")
     # target_payment = relationship("Payment")
-    # target_user = relationship("User", foreign_keys=[target_user_id])
+    target_user = relationship("User", foreign_keys=[target_user_id], lazy="joined")
 
 
 class FriendshipStatus(PyEnum):
@@ -390,6 +416,8 @@ class Friendship(Base):
     __tablename__ = "friendships"
     __table_args__ = (
         UniqueConstraint('requester_id', 'addressee_id', name='uq_friendship'),
+        # Incoming pending requests are looked up by addressee + status
+        Index('ix_friendships_addressee_status', 'addressee_id', 'status'),
     )
 
     requester_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
@@ -418,6 +446,8 @@ class GroupInvitation(Base):
     __tablename__ = "group_invitations"
     __table_args__ = (
         UniqueConstraint('group_id', 'invitee_id', name='uq_group_invitation'),
+        # A user's pending invitations are looked up by invitee + status
+        Index('ix_group_invitations_invitee_status', 'invitee_id', 'status'),
     )
 
     invitation_id = Column(Integer, primary_key=True, index=True)
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, status, HTTPException, Query, Path
 from sqlalchemy.exc import IntegrityError
-from decimal import Decimal, ROUND_HALF_UP
 
 import logging
 
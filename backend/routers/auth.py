@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import Annotated
 from datetime import timedelta
+from urllib.parse import urlencode
 from backend.dependencies import get_current_user
 import logging
 from fastapi.responses import RedirectResponse
@@ -11,11 +12,11 @@ from fastapi.responses import RedirectResponse
 from jose import jwt, JWTError
 
 from backend.crud import (
-    get_user_by_email, get_user_by_username,
+    get_user_by_email, get_user_conflicts,
     get_user_by_user_id, create_user, authenticate_user,
     create_user_from_google
 ) 
-from backend.schemas import User, UserCreate, Token, TokenData
+from backend.schemas import User as UserSchema, UserCreate, Token, TokenData
 from backend.security import (
     create_access_token,
     oauth2_scheme, 
@@ -42,8 +43,27 @@ oauth.register(
         'scope': 'openid email profile'
     }
 )
+
+
+async def prefetch_google_oauth_metadata() -> None:
+    """
+    Loads Google's OIDC discovery document and JWKS into the client at startup so the first
+    login on each worker does not wait on them. authlib keeps both in memory and re-fetches
+    the JWKS itself if Google rotates its signing keys.
+    """
+    try:
+        await oauth.google.load_server_metadata()
+        await oauth.google.fetch_jwk_set()
+        logger.info("Google OAuth metadata and JWKS loaded.")
+    except Exception as e:
+        # Not fatal: authlib falls back to fetching lazily on the first login
+        logger.warning(f"Could not prefetch Google OAuth metadata: {e}")
 # --------------------------
 
+# The frontend callback page reads the token from the query string and stores it itself
+_FRONTEND_AUTH_CALLBACK_URL = f"{FRONTEND_URL}/auth/callback"
+_GOOGLE_ACCESS_TOKEN_EXPIRES = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
 
 @router.get('/login/google')
 async def login_google(request: Request):
@@ -83,14 +103,16 @@ async def auth_google_callback(request: Request, db: DbSessionDep):
             logger.info(f"Existing user logged in with Google: {email}")
 
         # Create access token for the user
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": str(db_user.user_id)}, expires_delta=access_token_expires
+            data={"sub": str(db_user.user_id)}, expires_delta=_GOOGLE_ACCESS_TOKEN_EXPIRES
         )
         
         # Redirect to the frontend with the token
         # The frontend will be responsible for parsing this token
-        response = RedirectResponse(url=f"{FRONTEND_URL}/auth/callback?token={access_token}")
+        response = RedirectResponse(
+            url=f"{_FRONTEND_AUTH_CALLBACK_URL}?{urlencode({'token': access_token})}",
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        )
         return response
 
     except Exception as e:
@@ -101,17 +123,18 @@ async def auth_google_callback(request: Request, db: DbSessionDep):
         ) from e
 
 
-@router.post("/auth/register", response_model=User, status_code=status.HTTP_201_CREATED)
+@router.post("/auth/register", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
 async def register_user(user_in: UserCreate, db: DbSessionDep):
-    db_user_email = await get_user_by_email(db, email=user_in.email)
-    if db_user_email:
+    email_taken, username_taken = await get_user_conflicts(
+        db, email=user_in.email, username=user_in.username
+    )
+    if email_taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
     
-    db_user_username = await get_user_by_username(db, username=user_in.username)
-    if db_user_username:
+    if username_taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken",
@@ -119,33 +142,16 @@ async def register_user(user_in: UserCreate, db: DbSessionDep):
     try:
         # Attempt to create the user
         new_user = await create_user(db=db, user=user_in)
-        logger.info(f"User registered: {new_user.username}")
-        return new_user
-
     except IntegrityError as e:
+        # Lost a race with a concurrent registration; get_db handles the rollback
         logger.warning(f"Registration conflict/IntegrityError: {e}")
-
-        try:
-            await db.rollback()
-        except Exception as rollback_err:
-            logger.error(f"Error during rollback after registration IntegrityError: {rollback_err}")
-
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Username or email already registered.", # Covers the most common case
         ) from e
 
-    except Exception as e:
-        # Catch ANY other unexpected error during create_user or elsewhere
-        logger.exception("Unexpected error during user registration.") # Log the full error
-        try:
-            await db.rollback()
-        except Exception as rollback_err:
-            logger.error(f"Error during rollback after login exception: {rollback_err}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An internal error occurred during registration.", # Generic message
-        ) from e
+    logger.info(f"User registered: {new_user.username}")
+    return new_user
 
 
 @router.post("/auth/login/token", response_model=Token)
@@ -154,47 +160,24 @@ async def login_for_access_token(
     db: DbSessionDep,
 ):
     """Logs in a user and returns an access token."""
-    try:
-        logger.info(f"Login attempt for user: {form_data.username}")
-        # --- Core Logic ---
-        user = await authenticate_user(
-            db=db,
-            identifier=form_data.username, # Handles email OR username
-            password=form_data.password
-        )
-
-        if user is None:
-            logger.warning(f"Failed login attempt for user: {form_data.username}")
-            # This handles the expected "authentication failed" case correctly
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        # --- If authentication succeeded ---
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        # Ensure user_id is available on your user model returned by authenticate_user
-        access_token = create_access_token(
-            data={"sub": str(user.user_id)}, expires_delta=access_token_expires
+    logger.info(f"Login attempt for user: {form_data.username}")
+    user = await authenticate_user(
+        db=db,
+        identifier=form_data.username, # Handles email OR username
+        password=form_data.password
+    )
+
+    if user is None:
+        logger.warning(f"Failed login attempt for user: {form_data.username}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        logger.info(f"Successful login for user: {form_data.username}")
-        return Token(access_token=access_token, token_type="bearer")
-        # --- End Core Logic ---
-
-    except HTTPException:
-        raise
 
-    except Exception as e:
-        # Catch ANY unexpected error during authentication or token creation
-        logger.exception(f"Unexpected error during login for {form_data.username}.") # Log the full error
-        
-        try:
-            await db.rollback()
-        except Exception as rollback_err:
-            logger.error(f"Error during rollback after login exception: {rollback_err}")
-        
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An internal error occurred during login.", # Generic message
-        ) from e
\ No newline at end of file
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": str(user.user_id)}, expires_delta=access_token_expires
+    )
+    logger.info(f"Successful login for user: {form_data.username}")
+    return Token(access_token=access_token, token_type="bearer")
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Path, Request, Response
 from sqlalchemy.exc import IntegrityError
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
+from pydantic import TypeAdapter
 
 import logging
 
@@ -8,9 +9,10 @@ from backend.crud import (
     create_category, get_category, get_category_by_name,
     create_transaction, get_transaction, get_user_transactions,
     get_group, is_member_of_group, get_group_member_ids_and_names,
-    calculate_group_net_balances, calculate_suggested_settlements,
-    get_users_by_ids, get_user_by_user_id, calculate_balance_between_two_users,
-    calculate_all_balances_for_user_in_group, calculate_group_financial_bar_summary
+    calculate_suggested_settlements,
+    get_users_by_ids, get_member_user_in_group, calculate_balance_between_two_users,
+    calculate_all_balances_for_user_in_group, calculate_group_financial_bar_summary,
+    round_settlement_amount, user_to_schema
 )
 import backend.schemas as schemas
 from backend.schemas import (
@@ -18,11 +20,21 @@ from backend.schemas import (
 )
 from backend.database import DbSessionDep
 from backend.dependencies import get_current_user, validate_group_member
+from backend.services.http_cache import etag_matches
+from backend.services.balance_service import (
+    get_cached_group_net_balance_rows, net_balances_etag
+)
 import backend.models as models
 from fastapi_cache.decorator import cache
 
 logger = logging.getLogger(__name__)
 
+# Clients must revalidate, but may reuse their copy when the ETag still matches
+_BALANCE_CACHE_CONTROL = "private, no-cache"
+
+# Built once at import; validating whole lists runs in pydantic-core instead of a Python loop
+_SIMPLE_BALANCE_LIST_ADAPTER = TypeAdapter(list[schemas.SimpleUserBalance])
+
 router = APIRouter(
     prefix="/groups/{group_id}",
     tags=["balances"],
@@ -40,6 +52,8 @@ router = APIRouter(
 )
 # @cache(expire=300) // Temporarily disabled for debugging stale data issue
 async def read_group_balances(
+    request: Request,
+    response: Response,
     db: DbSessionDep,
     current_user: User = Depends(get_current_user),
     group_id: int = Path(...),
@@ -49,21 +63,20 @@ async def read_group_balances(
     logger.info(f"User {user_id} attempting to retrieve balances for group {group_id}")
 
     try:
-        raw_balances = await calculate_group_net_balances(db=db, group_id=group_id)
-
-        member_schemas = await get_group_member_ids_and_names(db=db, group_id=group_id)
-        member_names = {member.user_id: member.username for member in member_schemas}
-
-        user_balance_list: list[UserNetBalance] = []
-        for member_id, net_amount in raw_balances.items():
-            user_name = member_names.get(member_id, f"User {member_id}")
-            user_balance_list.append(
-                UserNetBalance(
-                    user_id=member_id,
-                    username=user_name,
-                    net_amount=net_amount
-                )
+        balance_rows = await get_cached_group_net_balance_rows(db=db, group_id=group_id)
+        etag = net_balances_etag("balances", group_id, balance_rows)
+        if etag_matches(request, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": _BALANCE_CACHE_CONTROL},
             )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = _BALANCE_CACHE_CONTROL
+
+        user_balance_list = [
+            UserNetBalance(user_id=member_id, username=username or f"User {member_id}", net_amount=net_amount)
+            for member_id, username, net_amount in balance_rows
+        ]
 
         balance_summary = GroupBalanceSummary(
             group_id=group_id,
@@ -96,6 +109,8 @@ async def read_group_balances(
 )
 # @cache(expire=300) // Temporarily disabled for debugging stale data issue
 async def get_group_settlements(
+    request: Request,
+    response: Response,
     db: DbSessionDep,
     current_user: User = Depends(get_current_user),
     group_id: int = Path(...),
@@ -105,52 +120,57 @@ async def get_group_settlements(
     logger.info(f"User {user_id} attempting to retrieve settlement suggestions for group {group_id}")
 
     try:
-        net_balances = await calculate_group_net_balances(db=db, group_id=group_id)
-        if not net_balances:
-            logger.info(f"No balances found for group {group_id} to calculate settlements.")
-            return SettlementSummary(group_id=group_id, suggested_payments=[])
+        balance_rows = await get_cached_group_net_balance_rows(db=db, group_id=group_id)
 
+        net_balances = {member_id: net_amount for member_id, _, net_amount in balance_rows}
         # Calculate suggested settlement payments using the service function
-        settlement_instructions = await calculate_suggested_settlements(
+        settlement_instructions = calculate_suggested_settlements(
             net_balances=net_balances
-        )
+        ) if net_balances else []
+
+        # Collect user ids for User nesting
+        involved_user_ids = {
+            user_id
+            for instruction in settlement_instructions
+            for user_id in (instruction.payer_id, instruction.payee_id)
+        }
+
+        # get_users_by_ids already returns User schemas, so each user is built once
+        users_involved = await get_users_by_ids(db=db, user_ids=involved_user_ids) if involved_user_ids else []
+
+        # The response nests full User objects, so a profile change must change the ETag too
+        etag = net_balances_etag("settlements", group_id, balance_rows, users=users_involved)
+        if etag_matches(request, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": _BALANCE_CACHE_CONTROL},
+            )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = _BALANCE_CACHE_CONTROL
+
         if not settlement_instructions:
             logger.info(f"No settlement payments needed for group {group_id}.")
             return SettlementSummary(group_id=group_id, suggested_payments=[])
-        
-        # Collect user ids for User nesting
-        involved_user_ids = set()
-        for instruction in settlement_instructions:
-            involved_user_ids.add(instruction.payer_id)
-            involved_user_ids.add(instruction.payee_id)
-        
-        # Fetch the User models for involved users
-        users_involved = await get_users_by_ids(db=db, user_ids=list(involved_user_ids))
-        user_lookup: dict[int, models.User] = {user.user_id: user for user in users_involved}
-
-        # Add UserBase to SuggestedPayment schema
-        suggested_payments: list[SuggestedPayment] = []
-        for instruction in settlement_instructions:
-            payer_model = user_lookup.get(instruction.payer_id)
-            payee_model = user_lookup.get(instruction.payee_id)
-
-            if not payer_model or not payee_model:
-                logger.error(
-                    f"Data integrity issue: User data not found for payer_id {instruction.payer_id} "
-                    f"or payee_id {instruction.payee_id} during settlement calculation for group {group_id}."
-                )
-                continue 
-
-            payer_details = schemas.User.model_validate(payer_model)
-            payee_details = schemas.User.model_validate(payee_model)
-
-            suggested_payments.append(
-                SuggestedPayment(
-                    payer=payer_details,
-                    payee=payee_details,
-                    amount=instruction.amount
-                )
+
+        user_lookup: dict[int, User] = {user.user_id: user for user in users_involved}
+
+        missing_user_ids = involved_user_ids - user_lookup.keys()
+        if missing_user_ids:
+            logger.error(
+                f"Data integrity issue: User data not found for user ids {sorted(missing_user_ids)} "
+                f"during settlement calculation for group {group_id}."
+            )
+
+        # Payers, payees and Decimal amounts are already typed, so skip re-validation
+        suggested_payments = [
+            SuggestedPayment.model_construct(
+                payer=user_lookup[instruction.payer_id],
+                payee=user_lookup[instruction.payee_id],
+                amount=instruction.amount,
             )
+            for instruction in settlement_instructions
+            if instruction.payer_id in user_lookup and instruction.payee_id in user_lookup
+        ]
 
         # Final response
         settlement_summary = SettlementSummary(
@@ -192,13 +212,6 @@ async def get_user_to_user_balance_endpoint( # Renamed for clarity
     _=Depends(validate_group_member),
     other_user_id: int = Path(...),
 ):
-    is_member = await is_member_of_group(db=db, user_id=other_user_id, group_id=group_id)
-    if not is_member:
-        logger.warning(f"User {current_user.user_id} forbidden access to group {group_id}.")
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this group")
-
-    other_user = await get_user_by_user_id(db=db, user_id=other_user_id)
-
     requester_user_id = current_user.user_id
 
     if requester_user_id == other_user_id:
@@ -207,6 +220,12 @@ async def get_user_to_user_balance_endpoint( # Renamed for clarity
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot calculate balance with oneself. Please specify a different user."
         )
+
+    # Membership check and user load in one round trip (the session can't run queries concurrently)
+    other_user = await get_member_user_in_group(db=db, group_id=group_id, user_id=other_user_id)
+    if other_user is None:
+        logger.warning(f"User {current_user.user_id} forbidden access to group {group_id}.")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this group")
     
     logger.info(
         f"User {requester_user_id} requesting balance with user {other_user_id} in group {group_id}."
@@ -222,11 +241,11 @@ async def get_user_to_user_balance_endpoint( # Renamed for clarity
         )
 
         response_data = schemas.UserToUserBalance(
-            user1=schemas.User.model_validate(current_user),
-            user2=schemas.User.model_validate(other_user),
+            user1=user_to_schema(current_user),
+            user2=user_to_schema(other_user),
             group_id=group_id,
             net_amount_user1_owes_user2=precise_balance,
-            suggested_settlement_amount=(precise_balance / 1000).quantize(Decimal("0"), rounding=ROUND_HALF_UP) * 1000
+            suggested_settlement_amount=round_settlement_amount(precise_balance)
         )
 
         logger.info(
@@ -275,14 +294,11 @@ async def get_all_user_to_user_balances_in_group(
             current_user_id=requester_user_id
         )
         
-        # Convert the raw data into the Pydantic response model
-        response_balances = [
-            schemas.SimpleUserBalance(
-                user=schemas.User.model_validate(user_model),
-                balance=balance_amount
-            )
-            for user_model, balance_amount in raw_balances
-        ]
+        # Convert the raw data into the Pydantic response model in a single validation pass
+        response_balances = _SIMPLE_BALANCE_LIST_ADAPTER.validate_python(
+            [{"user": user_model, "balance": balance_amount} for user_model, balance_amount in raw_balances],
+            from_attributes=True,
+        )
 
         return response_balances
     except HTTPException:
@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.orm import Session
+from fastapi_cache.decorator import cache
 import logging
 
 from backend import crud, schemas
 from backend.database import DbSessionDep
 from backend.dependencies import get_current_user, validate_group_member
+from backend.services.bill_category_service import (
+    BILL_CATEGORIES_CACHE_EXPIRE_SECONDS,
+    BILL_CATEGORIES_CACHE_NAMESPACE,
+    bill_categories_key_builder,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +28,11 @@ router = APIRouter(
     response_model=list[schemas.BillCategory],
     dependencies=[Depends(validate_group_member)], # Ensures user is part of the group
 )
+@cache(
+    expire=BILL_CATEGORIES_CACHE_EXPIRE_SECONDS,
+    namespace=BILL_CATEGORIES_CACHE_NAMESPACE,
+    key_builder=bill_categories_key_builder,
+)
 async def read_bill_categories_for_group(
     group_id: int,
     db: DbSessionDep,
@@ -36,7 +46,8 @@ async def read_bill_categories_for_group(
     try:
         categories = await crud.get_bill_categories_for_group(db, group_id=group_id)
         logger.info(f"Found {len(categories)} categories for group {group_id}")
-        return categories
+        # Validate here so the cache stores plain schemas rather than ORM instances
+        return [schemas.BillCategory.model_validate(category) for category in categories]
     except Exception as e:
         logger.exception(f"Error retrieving bill categories for group {group_id}: {e}")
         raise HTTPException(
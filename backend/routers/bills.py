@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, status, HTTPException, Path, Response, Query, UploadFile, File, Form
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+import asyncio
 import logging
 from fastapi_cache.decorator import cache
 import json
 from typing import Optional
+from pydantic import TypeAdapter, ValidationError
 
 from backend.crud import (
     get_group, is_member_of_group,
     create_bill, validate_member_ids_in_group,
-    get_bill, get_group_bills,
-    get_user_role_in_group, delete_bill,
+    get_bill, get_group_bills, get_bill_with_requester_role,
+    lock_bill_with_requester_role,
+    delete_bill,
     update_bill
 )
 from backend.schemas import (
@@ -17,24 +20,57 @@ from backend.schemas import (
 )
 import backend.models as models
 from backend.database import DbSessionDep
-from backend.dependencies import (
-    get_current_user, validate_group_member,
-    get_validated_bill_for_group, authorize_bill_operation
-)
+from backend.dependencies import get_current_user, validate_group_member, validate_group_member_for_write
 from backend.services.bill_services import (
     validate_bill_modification,
     update_bill_service, delete_bill_service
 )
 from backend.services.audit_service import record_group_activity
+from backend.services.balance_service import invalidate_group_balances
+from backend.services.bill_category_service import invalidate_group_bill_categories
+from backend.services.group_cache_service import bump_group_version
+from backend.services.bill_list_cache_service import (
+    GROUP_BILLS_CACHE_EXPIRE_SECONDS,
+    GROUP_BILLS_CACHE_NAMESPACE,
+    bump_group_bills_version,
+    group_bills_key_builder,
+)
+from backend.services.cache_coders import JsonResponseCoder
 from backend.services.gcs_service import upload_receipt_to_gcs
 logger = logging.getLogger(__name__)
 
+_BILL_ADAPTER = TypeAdapter(Bill)
+_BILL_LIST_ADAPTER = TypeAdapter(list[Bill])
+
+
+def _bill_json_response(db_bill: models.Bill, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Validates the ORM bill once and lets pydantic-core write the JSON; FastAPI passes a
+    returned Response through instead of validating against response_model and encoding again.
+    """
+    bill = _BILL_ADAPTER.validate_python(db_bill)
+    return Response(content=_BILL_ADAPTER.dump_json(bill), status_code=status_code, media_type="application/json")
+
 router = APIRouter(
     prefix="/groups/{group_id}/bills",
     tags=["bills"],
 )
 
 
+async def _upload_bill_receipt(receipt_image: UploadFile, group_id: int, bill_title: str) -> str:
+    try:
+        return await upload_receipt_to_gcs(
+            file=receipt_image,
+            group_id=group_id,
+            bill_title=bill_title
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Failed to upload receipt image for group %s: %s", group_id, e)
+        raise HTTPException(status_code=500, detail="Failed to upload receipt image.")
+
+
 @router.post(
     "/",
     response_model=Bill, # Only import Bill here
@@ -53,39 +89,37 @@ async def create_new_bill(
     bill_data: str = Form(...),
     receipt_image: Optional[UploadFile] = File(None),
     current_user: User = Depends(get_current_user),
-    _=Depends(validate_group_member),
+    _=Depends(validate_group_member_for_write),
 ):
-    logger.info(f"User {current_user.user_id} attempting to create a bill in group {group_id}")
+    logger.info("User %s attempting to create a bill in group %s", current_user.user_id, group_id)
 
     try:
-        # Pydantic v2 allows parsing from a JSON string
-        bill_in = BillCreate.parse_raw(bill_data)
-    except Exception as e:
-        logger.warning(f"Failed to parse bill_data JSON for user {current_user.user_id}: {e}")
+        # Parsed and validated in one pass by pydantic-core, without an intermediate dict
+        bill_in = BillCreate.model_validate_json(bill_data)
+    except ValidationError as e:
+        logger.warning("Failed to parse bill_data JSON for user %s: %s", current_user.user_id, e)
+        # Kept as a string: the create-bill form renders detail directly
         raise HTTPException(status_code=422, detail=f"Invalid bill data format: {e}")
 
-    image_url = None
-    if receipt_image:
-        try:
-            image_url = await upload_receipt_to_gcs(
-                file=receipt_image,
-                group_id=group_id,
-                bill_title=bill_in.title
-            )
-            # Add the URL to the bill creation data
-            bill_in.receipt_image_url = image_url
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-        except Exception as e:
-            logger.error(f"Failed to upload receipt image for group {group_id}: {e}")
-            raise HTTPException(status_code=500, detail="Failed to upload receipt image.")
-
     logger.info(
-        f"User {current_user.user_id} attempting to create bill '{bill_in.title}' in group {group_id}"
+        "User %s attempting to create bill '%s' in group %s", current_user.user_id, bill_in.title, group_id
     )
 
     try:
-        await validate_bill_modification(db=db, bill_in=bill_in, group_id=group_id)
+        if receipt_image:
+            # The upload only touches GCS, so it can overlap the DB-backed validation
+            validation_result, upload_result = await asyncio.gather(
+                validate_bill_modification(db=db, bill_in=bill_in, group_id=group_id),
+                _upload_bill_receipt(receipt_image, group_id=group_id, bill_title=bill_in.title),
+                return_exceptions=True,
+            )
+            # Report a validation failure ahead of an upload failure
+            for result in (validation_result, upload_result):
+                if isinstance(result, BaseException):
+                    raise result
+            bill_in.receipt_image_url = upload_result
+        else:
+            await validate_bill_modification(db=db, bill_in=bill_in, group_id=group_id)
         
         db_bill = await create_bill(
             db=db, 
@@ -103,22 +137,28 @@ async def create_new_bill(
         )
 
         await db.commit()
-        await db.refresh(db_bill)
-        
-        final_bill = await get_bill(db=db, bill_id=db_bill.bill_id)
+        await invalidate_group_balances(group_id)
+        await invalidate_group_bill_categories(group_id)
+        await bump_group_version(group_id) # Group responses embed its bill categories
+        await bump_group_bills_version(group_id)
+
+        # Reload in place with the response relationships; no separate refresh needed
+        final_bill = await get_bill(db=db, bill_id=db_bill.bill_id, populate_existing=True)
         logger.info(
-            f'''User {current_user.user_id} successfully created bill
-            {final_bill.bill_id} ('{final_bill.title}') in group {group_id}''')
-        return final_bill
+            "User %s successfully created bill %s ('%s') in group %s",
+            current_user.user_id, final_bill.bill_id, final_bill.title, group_id
+        )
+        return _bill_json_response(final_bill, status_code=status.HTTP_201_CREATED)
     
     except IntegrityError as e:
         logger.warning(
-            f'''IntegrityError during bill creation for group {group_id}
-            by user {current_user.user_id}: {e}''')
+            "IntegrityError during bill creation for group %s by user %s: %s",
+            group_id, current_user.user_id, e
+        )
         try:
             await db.rollback()
         except Exception as rollback_err:
-            logger.error(f"Error during rollback after bill creation IntegrityError: {rollback_err}")
+            logger.error("Error during rollback after bill creation IntegrityError: %s", rollback_err)
 
         detail = "Failed to create bill due to data conflict or invalid reference."
         status_code = status.HTTP_400_BAD_REQUEST
@@ -139,7 +179,7 @@ async def create_new_bill(
         try:
             await db.rollback()
         except Exception as rollback_err:
-            logger.error(f"Error during rollback after unexpected bill creation error: {rollback_err}")
+            logger.error("Error during rollback after unexpected bill creation error: %s", rollback_err)
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -163,19 +203,18 @@ async def read_bill(
     group_id: int = Path(...),
     _=Depends(validate_group_member),
 ):
-    logger.info(f"User {current_user.user_id} attempting to read bill {bill_id} in group {group_id}")
+    logger.info("User %s attempting to read bill %s in group %s", current_user.user_id, bill_id, group_id)
 
     try:        
         db_bill = await get_bill(db=db, bill_id=bill_id)
         if db_bill is None or db_bill.group_id != group_id:
             logger.warning(
-                f'''Read bill failed: Bill {bill_id} not found or
-                does not belong to group {group_id}.'''
+                "Read bill failed: Bill %s not found or does not belong to group %s.", bill_id, group_id
             )
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Bill not found in this group"
             )
-        return db_bill
+        return _bill_json_response(db_bill)
     
     except HTTPException:
         raise
@@ -199,28 +238,42 @@ async def read_bill(
         500: {"description": "Internal server error"},
     }
 )
-# @cache(expire=300) // Temporarily disabled for debugging stale data issue
+@cache(
+    expire=GROUP_BILLS_CACHE_EXPIRE_SECONDS,
+    namespace=GROUP_BILLS_CACHE_NAMESPACE,
+    key_builder=group_bills_key_builder,
+    coder=JsonResponseCoder,
+)
 async def read_group_bills(
     db: DbSessionDep,
     current_user: User = Depends(get_current_user),
     group_id: int = Path(...),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=10, ge=1, le=100),
+    before_bill_id: int | None = Query(
+        default=None,
+        ge=1,
+        description="bill_id of the last bill on the previous page; when set, skip is ignored.",
+    ),
     _=Depends(validate_group_member),
 ):
-    logger.info(f"User {current_user.user_id} attempting to read bills for group {group_id}")
+    logger.info("User %s attempting to read bills for group %s", current_user.user_id, group_id)
 
     try:
         db_group_bills = await get_group_bills(
             db=db,
             group_id=group_id,
             skip=skip,
-            limit=limit
+            limit=limit,
+            before_bill_id=before_bill_id,
         )
         logger.info(
-            f"User {current_user.user_id} successfully fetched {len(db_group_bills)} bills for group {group_id}"
+            "User %s successfully fetched %s bills for group %s", current_user.user_id, len(db_group_bills), group_id
         )
-        return db_group_bills  # Return the bills
+        # Serialized straight to JSON bytes by pydantic-core; a Response skips FastAPI's
+        # response_model re-validation, and the cache stores and serves these bytes as-is
+        bills_json = _BILL_LIST_ADAPTER.dump_json(_BILL_LIST_ADAPTER.validate_python(db_group_bills))
+        return Response(content=bills_json, media_type="application/json")
 
     except HTTPException:
         raise
@@ -248,26 +301,22 @@ async def delete_bill(
     bill_id: int,
     db: DbSessionDep,
     current_user: User = Depends(get_current_user),
-    _=Depends(validate_group_member),
+    _=Depends(validate_group_member_for_write),
 ):
     """
     Delete a bill. Only the bill creator, group admin, or group owner can delete a bill.
     """
     try:
-        # Get the bill with its group relationship
-        db_bill = await get_bill(db=db, bill_id=bill_id)
-        if not db_bill:
+        # Get the bill and the user's role in its group in one round-trip
+        bill_and_role = await get_bill_with_requester_role(
+            db=db, bill_id=bill_id, user_id=current_user.user_id
+        )
+        if bill_and_role is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bill not found",
             )
-
-        # Get user's role in the group
-        user_role = await get_user_role_in_group(
-            db=db,
-            user_id=current_user.user_id,
-            group_id=db_bill.group_id
-        )
+        db_bill, user_role = bill_and_role
 
         # Check if user is authorized to delete
         if (db_bill.created_by != current_user.user_id and 
@@ -313,9 +362,6 @@ async def update_bill_endpoint(
     current_user: User = Depends(get_current_user),
     group_id: int = Path(..., ge=1, description="ID of the group the bill belongs to"),
     bill_id: int = Path(..., ge=1, description="ID of the bill to update"),
-    _=Depends(validate_group_member),
-    __=Depends(authorize_bill_operation),
-    bill_to_update: models.Bill = Depends(get_validated_bill_for_group)
 ):
     """
     Updates a specified bill in a group. Requires the full new bill representation.
@@ -324,9 +370,32 @@ async def update_bill_endpoint(
     - Bill's creator, Group Owner, or Group Admin can update the bill.
     """
     requester_user_id = current_user.user_id # Assuming current_user.user_id exists
-    logger.info(f"User {requester_user_id} attempting to update bill {bill_id} in group {group_id}")
+    logger.info("User %s attempting to update bill %s in group %s", requester_user_id, bill_id, group_id)
 
     try:
+        # Fetch the bill and the user's role in one locked read, held until the service commits
+        bill_and_role = await lock_bill_with_requester_role(
+            db=db, bill_id=bill_id, group_id=group_id, user_id=requester_user_id
+        )
+        if bill_and_role is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bill not found")
+        bill_to_update, requester_role = bill_and_role
+
+        if requester_role is None:
+            logger.warning("User %s forbidden access to group %s.", requester_user_id, group_id)
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this group")
+
+        if (bill_to_update.created_by != requester_user_id and
+            requester_role not in [GroupRole.admin, GroupRole.owner]):
+            logger.warning(
+                "Authorization failed for bill %s: User %s is not bill creator (%s) nor group owner/admin.",
+                bill_id, requester_user_id, bill_to_update.created_by
+            )
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to perform this operation on the bill."
+            )
+
         # Check bill_in, update and create log
         updated_bill = await update_bill_service(
             db=db,
@@ -336,16 +405,16 @@ async def update_bill_endpoint(
             group_id=group_id
         )
 
-        final_bill = await get_bill(db=db, bill_id=updated_bill.bill_id)
+        final_bill = await get_bill(db=db, bill_id=updated_bill.bill_id, populate_existing=True)
         if not final_bill:
             logger.error(
-                f"CRITICAL: Bill {updated_bill.bill_id} updated by user {requester_user_id} "
-                f"but could not be re-fetched for response."
+                "CRITICAL: Bill %s updated by user %s but could not be re-fetched for response.",
+                updated_bill.bill_id, requester_user_id
             )
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Bill updated but failed to retrieve for response.")
 
-        logger.info(f"User {requester_user_id} successfully updated bill {bill_id} ('{final_bill.title}') in group {group_id}")
-        return final_bill
+        logger.info("User %s successfully updated bill %s ('%s') in group %s", requester_user_id, bill_id, final_bill.title, group_id)
+        return _bill_json_response(final_bill)
 
     except HTTPException:
         raise
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Path
+from fastapi import APIRouter, Depends, status, HTTPException, Path, Response
 from sqlalchemy.exc import IntegrityError
+from pydantic import TypeAdapter
 import logging
 
 from backend.crud import (
@@ -14,9 +15,21 @@ from backend.schemas import (
 )
 from backend.database import DbSessionDep
 from backend.dependencies import get_current_user
+from backend.services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+_CATEGORY_ADAPTER = TypeAdapter(TransactionCategory)
+_CATEGORY_LIST_ADAPTER = TypeAdapter(list[TransactionCategory])
+# Concurrent reads of the same user's categories share one query
+_user_categories_flight = SingleFlight()
+
+
+def _category_json_response(db_category, status_code: int = status.HTTP_200_OK) -> Response:
+    """Validates once and writes JSON with pydantic-core; FastAPI passes a returned Response through as-is."""
+    category = _CATEGORY_ADAPTER.validate_python(db_category)
+    return Response(content=_CATEGORY_ADAPTER.dump_json(category), status_code=status_code, media_type="application/json")
+
 router = APIRouter(
     prefix="/categories",
     tags=["transaction-categories"],
@@ -42,7 +55,7 @@ async def create_new_category(
     current_user: User = Depends(get_current_user),
 ):
     user_id = current_user.user_id
-    logger.info(f"User {user_id} attempting to create category with name: '{category_in.name}'")
+    logger.info("User %s attempting to create category with name: '%s'", user_id, category_in.name)
 
     try:
         db_category = await create_category(
@@ -51,14 +64,13 @@ async def create_new_category(
             user_id=user_id
         )
         logger.info(
-            f"User {user_id} successfully created category '{db_category.name}'"
-            f"(ID: {db_category.category_id})"
+            "User %s successfully created category '%s' (ID: %s)", user_id, db_category.name, db_category.category_id
         )
-        return db_category
+        return _category_json_response(db_category, status_code=status.HTTP_201_CREATED)
 
     except IntegrityError as e:
         logger.warning(
-            f"IntegrityError (likely duplicate name) for user {user_id} creating category '{category_in.name}': {e}"
+            "IntegrityError (likely duplicate name) for user %s creating category '%s': %s", user_id, category_in.name, e
         )
 
         raise HTTPException(
@@ -89,12 +101,16 @@ async def read_user_categories_endpoint(
     current_user: User = Depends(get_current_user),
 ):
     user_id = current_user.user_id
-    logger.info(f"User {user_id} attempting to retrieve their categories.")
+    logger.info("User %s attempting to retrieve their categories.", user_id)
 
     try:
-        categories = await get_user_categories(db=db, user_id=user_id)
-        logger.info(f"User {user_id} successfully retrieved {len(categories)} categories.")
-        return categories
+        async def load_categories() -> list[TransactionCategory]:
+            return _CATEGORY_LIST_ADAPTER.validate_python(await get_user_categories(db=db, user_id=user_id))
+
+        categories = await _user_categories_flight.do(user_id, load_categories)
+        logger.info("User %s successfully retrieved %s categories.", user_id, len(categories))
+        # Already schemas: dump straight to JSON and skip response_model re-validation
+        return Response(content=_CATEGORY_LIST_ADAPTER.dump_json(categories), media_type="application/json")
 
     except HTTPException:
         raise
@@ -120,17 +136,17 @@ async def read_category_endpoint(
     current_user: User = Depends(get_current_user),
 ):
     user_id = current_user.user_id
-    logger.info(f"User {user_id} attempting to retrieve category {category_id}.")
+    logger.info("User %s attempting to retrieve category %s.", user_id, category_id)
 
     try:
         category = await get_category(db=db, category_id=category_id, user_id=user_id)
 
         if category is None:
-            logger.warning(f"Category {category_id} not found or not owned by user {user_id}.")
+            logger.warning("Category %s not found or not owned by user %s.", category_id, user_id)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-        logger.info(f"User {user_id} successfully retrieved category '{category.name}' (ID: {category_id}).")
-        return category
+        logger.info("User %s successfully retrieved category '%s' (ID: %s).", user_id, category.name, category_id)
+        return _category_json_response(category)
 
     except HTTPException:
         raise
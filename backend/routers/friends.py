@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Response
 from sqlalchemy.exc import IntegrityError
+from pydantic import TypeAdapter
 import logging
 
 from backend import crud, schemas
 from backend.database import DbSessionDep
 from backend.dependencies import get_current_user
 from backend.models import NotificationType
+from backend.services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+_FRIENDSHIP_LIST_ADAPTER = TypeAdapter(list[schemas.Friendship])
+# Concurrent reads of the same user's friend list share one query
+_friends_flight = SingleFlight()
+
 router = APIRouter(
     prefix="/friends",
     tags=["friends"],
@@ -24,19 +30,19 @@ async def send_friend_request(
     """Send a friend request to another user."""
     requester_id = current_user.user_id
     addressee_id = friend_request.addressee_id
-    logger.info(f"User {requester_id} attempting to send friend request to user {addressee_id}")
-
-    # Check if the target user exists
-    addressee_user = await crud.get_user_by_user_id(db, user_id=addressee_id)
-    if not addressee_user:
-        logger.warning(f"Friend request failed: User {requester_id} tried to add non-existent user {addressee_id}.")
+    logger.info("User %s attempting to send friend request to user %s", requester_id, addressee_id)
+
+    # Addressee existence and any existing friendship in one round-trip
+    addressee_exists, friendship_exists = await crud.get_friend_request_preconditions(
+        db, requester_id=requester_id, addressee_id=addressee_id
+    )
+    if not addressee_exists:
+        logger.warning("Friend request failed: User %s tried to add non-existent user %s.", requester_id, addressee_id)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User to add not found.")
 
-    # Use the new validation function from crud
-    can_send = await crud.can_send_friend_request(db, user_id_1=requester_id, user_id_2=addressee_id)
-    if not can_send:
+    if friendship_exists or requester_id == addressee_id:
         detail="You are already friends with this user or a request is pending."
-        logger.warning(f"Friend request failed: User {requester_id} to {addressee_id}. Reason: {detail}")
+        logger.warning("Friend request failed: User %s to %s. Reason: %s", requester_id, addressee_id, detail)
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, 
             detail=detail
@@ -50,7 +56,7 @@ async def send_friend_request(
             db=db,
             recipient_user_id=addressee_id,
             notification_type=NotificationType.friend_request,
-            message=f"{current_user.full_name or current_user.username} sent you a friend request.",
+            message=f"{current_user.display_name} sent you a friend request.",
             related_user_id=requester_id
         )
         # --- End Notification ---
@@ -60,10 +66,10 @@ async def send_friend_request(
         # Re-fetch the object to ensure all relationships are loaded for the response
         final_friendship = await crud.get_friendship_by_users(db, user_id_1=requester_id, user_id_2=addressee_id)
         
-        logger.info(f"User {requester_id} successfully sent friend request to {addressee_id}.")
+        logger.info("User %s successfully sent friend request to %s.", requester_id, addressee_id)
         return final_friendship
     except ValueError as e: # Catch self-friendship from crud
-        logger.warning(f"Friend request failed: User {requester_id} tried to send a request to themselves. Error: {e}")
+        logger.warning("Friend request failed: User %s tried to send a request to themselves. Error: %s", requester_id, e)
         await db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -78,11 +84,17 @@ async def get_friends(
     current_user: schemas.User = Depends(get_current_user),
 ):
     """Get a list of accepted friends."""
-    logger.info(f"User {current_user.user_id} fetching their friend list.")
+    logger.info("User %s fetching their friend list.", current_user.user_id)
     try:
-        friends = await crud.get_friendships_for_user(db, user_id=current_user.user_id)
-        logger.info(f"Successfully fetched {len(friends)} friends for user {current_user.user_id}.")
-        return friends
+        user_id = current_user.user_id
+
+        async def load_friends() -> list[schemas.Friendship]:
+            return _FRIENDSHIP_LIST_ADAPTER.validate_python(await crud.get_friendships_for_user(db, user_id=user_id))
+
+        friends = await _friends_flight.do(user_id, load_friends)
+        logger.info("Successfully fetched %s friends for user %s.", len(friends), current_user.user_id)
+        # Already schemas: dump straight to JSON and skip response_model re-validation
+        return Response(content=_FRIENDSHIP_LIST_ADAPTER.dump_json(friends), media_type="application/json")
     except Exception as e:
         logger.exception(f"Error fetching friends for user {current_user.user_id}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not retrieve friends.")
@@ -94,11 +106,14 @@ async def get_received_pending_requests(
     current_user: schemas.User = Depends(get_current_user),
 ):
     """Get a list of pending friend requests received by the user."""
-    logger.info(f"User {current_user.user_id} fetching their received pending friend requests.")
+    logger.info("User %s fetching their received pending friend requests.", current_user.user_id)
     try:
         pending_requests = await crud.get_received_pending_friend_requests(db, user_id=current_user.user_id)
-        logger.info(f"Successfully fetched {len(pending_requests)} received pending requests for user {current_user.user_id}.")
-        return pending_requests
+        logger.info("Successfully fetched %s received pending requests for user %s.", len(pending_requests), current_user.user_id)
+        return Response(
+            content=_FRIENDSHIP_LIST_ADAPTER.dump_json(_FRIENDSHIP_LIST_ADAPTER.validate_python(pending_requests)),
+            media_type="application/json",
+        )
     except Exception as e:
         logger.exception(f"Error fetching received pending requests for user {current_user.user_id}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not retrieve received pending requests.")
@@ -110,11 +125,14 @@ async def get_sent_pending_requests(
     current_user: schemas.User = Depends(get_current_user),
 ):
     """Get a list of pending friend requests sent by the user."""
-    logger.info(f"User {current_user.user_id} fetching their sent pending friend requests.")
+    logger.info("User %s fetching their sent pending friend requests.", current_user.user_id)
     try:
         pending_requests = await crud.get_sent_pending_friend_requests(db, user_id=current_user.user_id)
-        logger.info(f"Successfully fetched {len(pending_requests)} sent pending requests for user {current_user.user_id}.")
-        return pending_requests
+        logger.info("Successfully fetched %s sent pending requests for user %s.", len(pending_requests), current_user.user_id)
+        return Response(
+            content=_FRIENDSHIP_LIST_ADAPTER.dump_json(_FRIENDSHIP_LIST_ADAPTER.validate_python(pending_requests)),
+            media_type="application/json",
+        )
     except Exception as e:
         logger.exception(f"Error fetching sent pending requests for user {current_user.user_id}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not retrieve sent pending requests.")
@@ -128,33 +146,33 @@ async def accept_friend_request(
 ):
     """Accept a friend request."""
     addressee_id = current_user.user_id
-    logger.info(f"User {addressee_id} attempting to accept friend request from {requester_id}")
+    logger.info("User %s attempting to accept friend request from %s", addressee_id, requester_id)
 
     friendship = await crud.get_friendship_by_users(db, user_id_1=requester_id, user_id_2=addressee_id)
 
     if not friendship or friendship.addressee_id != addressee_id or friendship.status != schemas.FriendshipStatus.pending:
-        logger.warning(f"Friend request acceptance failed: No pending request found from {requester_id} for user {addressee_id}.")
+        logger.warning("Friend request acceptance failed: No pending request found from %s for user %s.", requester_id, addressee_id)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No pending friend request from this user to you.")
 
     try:
         # Explicitly create the update object with ACCEPTED status
         friendship_update = schemas.FriendshipUpdate(status=schemas.FriendshipStatus.accepted)
-        await crud.update_friendship(db, db_friendship=friendship, friendship_up=friendship_update)
+        updated_friendship = await crud.update_friendship(db, db_friendship=friendship, friendship_up=friendship_update)
 
         # --- Create Notification for the Requester ---
         await crud.create_notification(
             db=db,
             recipient_user_id=requester_id,
             notification_type=NotificationType.friend_request_accepted,
-            message=f"{current_user.full_name or current_user.username} accepted your friend request.",
+            message=f"{current_user.display_name} accepted your friend request.",
             related_user_id=addressee_id
         )
         # --- End Notification ---
 
         await db.commit()
-        logger.info(f"User {addressee_id} successfully accepted friend request from {requester_id}.")
+        logger.info("User %s successfully accepted friend request from %s.", addressee_id, requester_id)
         
-        updated_friendship = await crud.get_friendship_by_users(db=db, user_id_1=requester_id, user_id_2=addressee_id)
+        # Users were loaded with the friendship and no column was left expired, so no re-fetch
         return updated_friendship
     except Exception as e:
         logger.exception(f"Error accepting friend request from {requester_id} for user {addressee_id}: {e}")
@@ -170,18 +188,18 @@ async def decline_friend_request(
 ):
     """Decline and delete a friend request."""
     addressee_id = current_user.user_id
-    logger.info(f"User {addressee_id} attempting to decline friend request from {requester_id}")
+    logger.info("User %s attempting to decline friend request from %s", addressee_id, requester_id)
 
     friendship = await crud.get_friendship_by_users(db, user_id_1=requester_id, user_id_2=addressee_id)
 
     if not friendship or friendship.addressee_id != addressee_id or friendship.status != schemas.FriendshipStatus.pending:
-        logger.warning(f"Friend request decline failed: No pending request found from {requester_id} for user {addressee_id}.")
+        logger.warning("Friend request decline failed: No pending request found from %s for user %s.", requester_id, addressee_id)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No pending friend request from this user to you.")
 
     try:
         await crud.delete_friendship(db, db_friendship=friendship)
         await db.commit()
-        logger.info(f"User {addressee_id} successfully declined and deleted friend request from {requester_id}.")
+        logger.info("User %s successfully declined and deleted friend request from %s.", addressee_id, requester_id)
         return
     except Exception as e:
         logger.exception(f"Error declining friend request from {requester_id} for user {addressee_id}: {e}")
@@ -3,6 +3,8 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import Annotated
+from pydantic import TypeAdapter
+import orjson
 from datetime import timedelta
 from backend.dependencies import get_current_user
 import logging
@@ -12,25 +14,39 @@ import backend.models as models
 from backend.models import GroupRole, AuditActionType
 
 from backend.crud import (
-    create_group, get_user_groups, get_group, is_member_of_group, add_user_to_group,
+    create_group, get_user_groups, get_group, add_user_to_group,
     get_user_role_in_group, get_user_by_user_id, get_group_members, 
-    remove_user_from_group, get_group_member_with_user, get_group_audit_log_entries,
-    get_users_by_ids, get_pending_invitations_for_group,
-    update_group, calculate_group_net_balances, swap_owner_with_admin, update_member_role
+    remove_user_from_group, get_group_member_with_user, get_group_members_with_users_by_ids, get_group_audit_log_entries,
+    get_group_membership_status, user_to_schema,
+    get_pending_invitations_for_group,
+    update_group, get_user_net_balance_in_group, swap_owner_with_admin, update_member_role
 ) 
-from backend.schemas import User, Group, GroupCreate, GroupUpdate, GroupMember, GroupMemberCreate, GroupActivityFeedResponse, AuditLogEntryResponse, GroupInvitation, UserRoleResponse, GroupMemberRoleUpdate
+from backend.schemas import User, Group, GroupCreate, GroupUpdate, GroupMember, GroupMemberCreate, GroupActivityFeedResponse, GroupInvitation, UserRoleResponse, GroupMemberRoleUpdate
 from backend.security import (
     create_access_token,
     oauth2_scheme, 
     SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 from backend.database import DbSessionDep
-from backend.dependencies import get_current_user, validate_group_member
+from backend.dependencies import get_current_user, validate_group_member, validate_group_member_for_write
 from backend.services.audit_service import record_group_activity
+from backend.services.balance_service import invalidate_group_balances
+from backend.services.cache_coders import JsonResponseCoder
+from backend.services.membership_cache import invalidate_cached_membership
+from backend.services.group_cache_service import (
+    GROUP_CACHE_EXPIRE_SECONDS,
+    GROUP_CACHE_NAMESPACE,
+    bump_group_version,
+    group_user_key_builder,
+)
 from fastapi_cache.decorator import cache
 
 logger = logging.getLogger(__name__) # Get a logger for this module
 
+_GROUP_LIST_ADAPTER = TypeAdapter(list[Group])
+_GROUP_MEMBER_LIST_ADAPTER = TypeAdapter(list[GroupMember])
+_GROUP_INVITATION_LIST_ADAPTER = TypeAdapter(list[GroupInvitation])
+
 router = APIRouter(
     prefix="/groups",
     tags=["groups"], 
@@ -43,7 +59,7 @@ async def create_new_group(
     db: DbSessionDep,
     current_user: User = Depends(get_current_user),
 ):
-    logger.info(f"User {current_user.user_id} attempting to create group '{group_in.group_name}'")
+    logger.info("User %s attempting to create group '%s'", current_user.user_id, group_in.group_name)
 
     try:
         db_group = await create_group(group_in=group_in, db=db, creator_id=current_user.user_id)
@@ -56,19 +72,20 @@ async def create_new_group(
         )
 
         await db.commit()
-        await db.refresh(db_group)
         
-        logger.info(f"User {current_user.user_id} successfully created group {db_group.group_id} ('{db_group.group_name}')")
+        logger.info("User %s successfully created group %s ('%s')", current_user.user_id, db_group.group_id, db_group.group_name)
         
+        # The one reload: it loads members (with users) and bill categories for the response.
+        # It also fills the new membership's server-set joined_at, so no refresh is needed before it.
         final_group = await get_group(group_id=db_group.group_id, db=db)
         return final_group
 
     except IntegrityError as e:
-        logger.warning(f"IntegrityError by user {current_user.user_id} creating group '{group_in.group_name}': {e}") # Use warning for 4xx errors
+        logger.warning("IntegrityError by user %s creating group '%s': %s", current_user.user_id, group_in.group_name, e) # Use warning for 4xx errors
         try:
             await db.rollback()
         except Exception as rollback_err:
-            logger.error(f"Error during rollback after login exception: {rollback_err}")
+            logger.error("Error during rollback after login exception: %s", rollback_err)
         
         detail = "Failed to create group. Potential conflict or invalid data."
         status_code = status.HTTP_400_BAD_REQUEST
@@ -79,11 +96,11 @@ async def create_new_group(
         raise HTTPException(status_code=status_code, detail=detail) from e
 
     except Exception as e:
-        logger.exception(f"Unexpected error by user {current_user.user_id} creating group '{group_in.group_name}'")
+        logger.exception("Unexpected error by user %s creating group '%s'", current_user.user_id, group_in.group_name)
         try:
             await db.rollback()
         except Exception as rollback_err:
-            logger.error(f"Error during rollback after login exception: {rollback_err}")
+            logger.error("Error during rollback after login exception: %s", rollback_err)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred",
@@ -91,32 +108,36 @@ async def create_new_group(
 
 
 @router.get("/{group_id}", response_model=Group)
+@cache(
+    expire=GROUP_CACHE_EXPIRE_SECONDS,
+    namespace=GROUP_CACHE_NAMESPACE,
+    key_builder=group_user_key_builder,
+    coder=JsonResponseCoder,
+)
 async def read_group(
     group_id: int,
     db: DbSessionDep,
     current_user: User = Depends(get_current_user),
 ):
-    logger.info(f"User {current_user.user_id} attempting to read group {group_id}")
+    logger.info("User %s attempting to read group %s", current_user.user_id, group_id)
 
     try:
-        is_member = await is_member_of_group(db=db, user_id=current_user.user_id, group_id=group_id)
-        if not is_member:
-            logger.warning(f"User {current_user.user_id} forbidden access to group {group_id}.")
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not a member of the group")
-
         db_group = await get_group(db=db, group_id=group_id)
-        if db_group is None:
-            logger.warning(f"Group {group_id} not found for user {current_user.user_id}.")
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+        # The members are loaded for the response anyway, so check membership against them.
+        # A missing group gets the same answer as a non-member, so ids can't be probed.
+        if db_group is None or not any(member.user_id == current_user.user_id for member in db_group.members):
+            logger.warning("User %s forbidden access to group %s (missing or not a member).", current_user.user_id, group_id)
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not a member of the group")
 
-        logger.info(f"User {current_user.user_id} successfully accessed group {group_id}")
-        return db_group
+        logger.info("User %s successfully accessed group %s", current_user.user_id, group_id)
+        # JSON bytes in a Response: cached as-is, and not re-validated against response_model
+        return Response(content=Group.model_validate(db_group).model_dump_json(), media_type="application/json")
     
     except HTTPException:
         raise
     
     except Exception as e:
-        logger.exception(f"Error reading group {group_id} for user {current_user.user_id}")
+        logger.exception("Error reading group %s for user %s", group_id, current_user.user_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred",
@@ -129,12 +150,15 @@ async def read_user_groups(
     current_user: User = Depends(get_current_user),
 ):
     try:
-        logger.info(f"Fetching groups for user_id: {current_user.user_id}")
+        logger.info("Fetching groups for user_id: %s", current_user.user_id)
         groups = await get_user_groups(db=db, user_id=current_user.user_id)
-        return groups
+        return Response(
+            content=_GROUP_LIST_ADAPTER.dump_json(_GROUP_LIST_ADAPTER.validate_python(groups)),
+            media_type="application/json",
+        )
     
     except Exception as e:
-        logger.exception(f"Error fetching groups for user_id: {current_user.user_id}")
+        logger.exception("Error fetching groups for user_id: %s", current_user.user_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred",
@@ -156,39 +180,37 @@ async def add_member_to_group(
     db: DbSessionDep,
     member_data: GroupMemberCreate,
     current_user: User = Depends(get_current_user),
-    _=Depends(validate_group_member)
+    # The membership check already reads the requester's role, from the database rather than the cache
+    requester_role: GroupRole = Depends(validate_group_member_for_write)
 ):
     requester_id = current_user.user_id
     user_id_to_add = member_data.user_id
     role_to_add = member_data.role
 
     logger.info(
-        f"User {requester_id} attempting to add user {user_id_to_add} "
-        f"with role {role_to_add.value} to group {group_id}"
+        "User %s attempting to add user %s with role %s to group %s",
+        requester_id, user_id_to_add, role_to_add.value, group_id,
     )
 
     try:
-        # Get & check requester's role in this group
-        requester_role = await get_user_role_in_group(
-            db=db, user_id=requester_id, group_id=group_id
-        )
+        # Check requester's role in this group
         allowed_to_initiate_add = {GroupRole.owner, GroupRole.admin}
         if requester_role not in allowed_to_initiate_add:
-            logger.warning(f"User {requester_id} (role: {requester_role}) forbidden to add members to group {group_id}.")
+            logger.warning("User %s (role: %s) forbidden to add members to group %s.", requester_id, requester_role, group_id)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to add members to this group")
 
         # Permission check
         if role_to_add == GroupRole.owner:
-            logger.warning(f"User {requester_id} attempted to add user {user_id_to_add} as owner.")
+            logger.warning("User %s attempted to add user %s as owner.", requester_id, user_id_to_add)
             raise HTTPException(status_code=400, detail="Cannot add a member with the 'owner' role directly.")
         elif role_to_add == GroupRole.admin and requester_role != GroupRole.owner:
-            logger.warning(f"Admin {requester_id} attempted to add user {user_id_to_add} as admin.")
+            logger.warning("Admin %s attempted to add user %s as admin.", requester_id, user_id_to_add)
             raise HTTPException(status_code=403, detail="Only group owners can add other admins.")
 
         # Check if user_id_to_add is already in the group
         user_to_add = await get_user_by_user_id(db=db, user_id=user_id_to_add)
         if not user_to_add:
-            logger.warning(f"Add member failed: User {user_id_to_add} already in group {group_id}.")
+            logger.warning("Add member failed: User %s already in group %s.", user_id_to_add, group_id)
             raise HTTPException(status_code=409, detail=f"User (ID: {user_id_to_add}) is already a member...")
 
         # Add member
@@ -198,7 +220,7 @@ async def add_member_to_group(
             user_id=user_id_to_add,
             role=role_to_add
         )
-        logger.info(f"Successfully added user {user_id_to_add} to group {group_id} with role {role_to_add.value} by user {requester_id}")
+        logger.info("Successfully added user %s to group %s with role %s by user %s", user_id_to_add, group_id, role_to_add.value, requester_id)
 
         await record_group_activity(
             db=db,
@@ -209,6 +231,8 @@ async def add_member_to_group(
         )
 
         await db.commit()
+        await invalidate_group_balances(group_id)
+        await bump_group_version(group_id)
 
         new_membership_details = await get_group_member_with_user(
             db=db,
@@ -217,17 +241,17 @@ async def add_member_to_group(
         )
 
         if not new_membership_details:
-            logger.error(f"Could not retrieve newly added membership for user {user_id_to_add} in group {group_id}")
+            logger.error("Could not retrieve newly added membership for user %s in group %s", user_id_to_add, group_id)
             raise HTTPException(status_code=500, detail="Failed to retrieve membership details after creation.")
 
         return new_membership_details
         
     except IntegrityError as e:
-        logger.warning(f"IntegrityError adding user {current_user.user_id} to group {group_id}")
+        logger.warning("IntegrityError adding user %s to group %s", current_user.user_id, group_id)
         try:
             await db.rollback()
         except Exception as rollback_err:
-            logger.error(f"Error during rollback after login exception: {rollback_err}")
+            logger.error("Error during rollback after login exception: %s", rollback_err)
 
         # --- MySQL Specific Error Handling ---
         detail = "An integrity error occurred." # Generic fallback
@@ -261,7 +285,7 @@ async def add_member_to_group(
         try:
             await db.rollback()
         except Exception as rollback_err:
-            logger.error(f"Error during rollback after login exception: {rollback_err}")
+            logger.error("Error during rollback after login exception: %s", rollback_err)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred",
@@ -284,31 +308,32 @@ async def read_group_members(
 ):
     """Retrieves a list of members for a specific group."""
     user_id = current_user.user_id
-    logger.info(f"User {user_id} attempting to retrieve members for group {group_id}")
+    logger.info("User %s attempting to retrieve members for group %s", user_id, group_id)
 
     try:
-        # Check if group exists/user have access to this group
-        group = await get_group(db=db, group_id=group_id)
-        if not group:
-            logger.warning(f"List members failed: Group {group_id} not found.")
+        # Check if group exists/user have access to this group, in one query
+        group_exists, role = await get_group_membership_status(db=db, user_id=user_id, group_id=group_id)
+        if not group_exists:
+            logger.warning("List members failed: Group %s not found.", group_id)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
 
-        is_member = await is_member_of_group(db=db, user_id=user_id, group_id=group_id)
-        if not is_member:
-            logger.warning(f"User {user_id} forbidden access to members of group {group_id}.")
+        if role is None:
+            logger.warning("User %s forbidden access to members of group %s.", user_id, group_id)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this group")
 
         # Get members
         members = await get_group_members(db=db, group_id=group_id)
 
-        logger.info(f"User {user_id} successfully retrieved {len(members)} members for group {group_id}.")
-        return members
+        logger.info("User %s successfully retrieved %s members for group %s.", user_id, len(members), group_id)
+        # Validate once and write JSON with pydantic-core; a returned Response skips response_model re-validation
+        member_list = _GROUP_MEMBER_LIST_ADAPTER.validate_python(members)
+        return Response(content=_GROUP_MEMBER_LIST_ADAPTER.dump_json(member_list), media_type="application/json")
 
     except HTTPException:
         raise
 
     except Exception as e:
-        logger.exception(f"Error reading group members for group {group_id} by user {current_user.user_id}")
+        logger.exception("Error reading group members for group %s by user %s", group_id, current_user.user_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while fetching group members."
@@ -339,58 +364,59 @@ async def remove_member_from_group_endpoint(
     - Cannot remove the Owner.
     """
     requester_id = current_user.user_id
-    logger.info(f"User {requester_id} attempting to remove user {user_id_to_remove} from group {group_id}")
+    logger.info("User %s attempting to remove user %s from group %s", requester_id, user_id_to_remove, group_id)
 
     # Prevent removing self
     if requester_id == user_id_to_remove:
        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot remove yourself from the group. Please use the 'Leave Group' feature.")
 
     try:
-        # Check group existence
-        group = await get_group(db=db, group_id=group_id)
-        if not group:
-            raise HTTPException(status_code=404, detail="Group not found")
-
-        # Balance Check: Ensure the user to be removed has a zero balance
-        net_balances = await calculate_group_net_balances(db=db, group_id=group_id)
-        user_balance = net_balances.get(user_id_to_remove)
-
-        if user_balance is not None and user_balance != 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot remove a member with an outstanding balance. Please settle all debts before removing the member."
-            )
-
-        # Get roles of both users (also confirms they are members)
-        requester_role = await get_user_role_in_group(db=db, user_id=requester_id, group_id=group_id)
-        target_member_role = await get_user_role_in_group(db=db, user_id=user_id_to_remove, group_id=group_id)
+        # Both memberships, with the target's user row, in one round-trip
+        memberships = await get_group_members_with_users_by_ids(
+            db=db, group_id=group_id, user_ids={requester_id, user_id_to_remove}
+        )
 
-        if requester_role is None:
+        if requester_id not in memberships:
+            # Only now tell a missing group apart from a non-member
+            if not await get_group(db=db, group_id=group_id):
+                raise HTTPException(status_code=404, detail="Group not found")
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this group.")
 
-        if target_member_role is None:
+        if user_id_to_remove not in memberships:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User to remove is not a member of this group.")
 
-        removed_user = await get_user_by_user_id(db=db, user_id=user_id_to_remove)
+        requester_role = memberships[requester_id].role
+        target_member_role = memberships[user_id_to_remove].role
+        removed_user = memberships[user_id_to_remove].user
 
         if target_member_role == GroupRole.owner:
-            logger.warning(f"User {requester_id} attempted to remove the owner (user {user_id_to_remove}).")
+            logger.warning("User %s attempted to remove the owner (user %s).", requester_id, user_id_to_remove)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The group owner cannot be removed.")
 
         if requester_role == GroupRole.member:
-            logger.warning(f"Member {requester_id} attempted to remove user {user_id_to_remove}.")
+            logger.warning("Member %s attempted to remove user %s.", requester_id, user_id_to_remove)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Members cannot remove other members.")
 
         if requester_role == GroupRole.admin and target_member_role != GroupRole.member:
-            logger.warning(f"Admin {requester_id} attempted to remove non-member role ({target_member_role.value}).")
+            logger.warning("Admin %s attempted to remove non-member role (%s).", requester_id, target_member_role.value)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admins can only remove members.")
 
+        # Balance Check: Ensure the user to be removed has a zero balance
+        # (after the cheap role checks, so unauthorized requests never compute balances)
+        user_balance = await get_user_net_balance_in_group(db, group_id=group_id, user_id=user_id_to_remove)
+
+        if user_balance != 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot remove a member with an outstanding balance. Please settle all debts before removing the member."
+            )
+
         removed = await remove_user_from_group(
             db=db, group_id=group_id, user_id_to_remove=user_id_to_remove
         )
 
         if not removed:
-            logger.error(f"Removal reported failure for user {user_id_to_remove} despite checks.")
+            logger.error("Removal reported failure for user %s despite checks.", user_id_to_remove)
             raise HTTPException(status_code=500, detail="Failed to remove member.")
         
         await record_group_activity(
@@ -402,14 +428,17 @@ async def remove_member_from_group_endpoint(
         )
 
         await db.commit()
-        logger.info(f"User {requester_id} successfully removed user {user_id_to_remove} from group {group_id}")
+        await invalidate_cached_membership(group_id, user_id_to_remove)
+        await invalidate_group_balances(group_id)
+        await bump_group_version(group_id)
+        logger.info("User %s successfully removed user %s from group %s", requester_id, user_id_to_remove, group_id)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     except HTTPException:
         raise
     
     except Exception as e:
-        logger.exception(f"Unexpected error removing user {user_id_to_remove} from group {group_id}: {e}")
+        logger.exception("Unexpected error removing user %s from group %s: %s", user_id_to_remove, group_id, e)
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -437,7 +466,7 @@ async def leave_group(
     - A member cannot leave if they have an outstanding balance.
     """
     user_id_to_leave = current_user.user_id
-    logger.info(f"User {user_id_to_leave} attempting to leave group {group_id}")
+    logger.info("User %s attempting to leave group %s", user_id_to_leave, group_id)
 
     try:
         user_role = await get_user_role_in_group(db, user_id=user_id_to_leave, group_id=group_id)
@@ -450,8 +479,7 @@ async def leave_group(
                 detail="Owners cannot leave the group. Please transfer ownership to another member first."
             )
 
-        net_balances = await calculate_group_net_balances(db, group_id=group_id)
-        user_balance = net_balances.get(user_id_to_leave, 0)
+        user_balance = await get_user_net_balance_in_group(db, group_id=group_id, user_id=user_id_to_leave)
         if user_balance != 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -472,14 +500,17 @@ async def leave_group(
         )
 
         await db.commit()
-        logger.info(f"User {user_id_to_leave} successfully left group {group_id}")
+        await invalidate_cached_membership(group_id, user_id_to_leave)
+        await invalidate_group_balances(group_id)
+        await bump_group_version(group_id)
+        logger.info("User %s successfully left group %s", user_id_to_leave, group_id)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     except HTTPException:
         await db.rollback()
         raise
     except Exception as e:
-        logger.exception(f"Unexpected error for user {user_id_to_leave} leaving group {group_id}: {e}")
+        logger.exception("Unexpected error for user %s leaving group %s: %s", user_id_to_leave, group_id, e)
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -487,6 +518,20 @@ async def leave_group(
         )
 
 
+def _audit_fallback_message(entry_orm: models.AuditLogEntry) -> str:
+    """Builds a display message for audit entries saved without a summary_message."""
+    actor_model = entry_orm.actor
+    actor_name_str = actor_model.username if actor_model and actor_model.username else "System"
+    display_msg = f"{actor_name_str} performed action: {entry_orm.action_type.value}"
+    if entry_orm.target_bill_id: display_msg += f" on bill {entry_orm.target_bill_id}"
+    if entry_orm.target_payment_id: display_msg += f" on payment {entry_orm.target_payment_id}"
+    if entry_orm.target_user_id:
+        target_user_model = entry_orm.target_user
+        target_user_name_str = target_user_model.username if target_user_model and target_user_model.username else f"user {entry_orm.target_user_id}"
+        display_msg += f" affecting {target_user_name_str}"
+    return display_msg
+
+
 @router.get(
     "/{group_id}/activities",
     response_model=GroupActivityFeedResponse,
@@ -505,7 +550,7 @@ async def get_group_activity_feed_from_audit(
     _=Depends(validate_group_member),
 ):
     user_id = current_user.user_id
-    logger.info(f"User {user_id} requesting activity feed for group {group_id} from audit log (skip: {skip}, limit: {limit})")
+    logger.info("User %s requesting activity feed for group %s from audit log (skip: %s, limit: %s)", user_id, group_id, skip, limit)
 
     try:
         # Fetch audit logs
@@ -516,62 +561,38 @@ async def get_group_activity_feed_from_audit(
         if not audit_entries:
             return GroupActivityFeedResponse(group_id=group_id, activities=[])
 
-        # Fetch all users in logs
-        user_ids_to_fetch: set[int] = set()
+        # Actor and target users were joined into the same query.
+        # One dict per distinct user; most entries in a feed share a few actors
+        actor_dicts: dict[int, dict] = {}
         for entry in audit_entries:
-            if entry.actor_user_id:
-                user_ids_to_fetch.add(entry.actor_user_id)
-            if entry.target_user_id:
-                user_ids_to_fetch.add(entry.target_user_id)
-            # If summary_message needs names from target_bill_id or target_payment_id's users,
-            # you'd need to fetch those bills/payments and then their users.
-            # For simplicity, we'll assume summary_message is self-contained or uses IDs for now.
-
-        user_models_map: dict[int, models.User] = {}
-        if user_ids_to_fetch:
-            user_list = await get_users_by_ids(db=db, user_ids=list(user_ids_to_fetch))
-            user_models_map = {user.user_id: user for user in user_list}
-
-        # 3. Format into final response AuditLogEntryResponse
-        response_activities: list[AuditLogEntryResponse] = []
-        for entry_orm in audit_entries:
-            actor_model = user_models_map.get(entry_orm.actor_user_id) if entry_orm.actor_user_id else None
-            actor_schema = User.model_validate(actor_model) if actor_model else None
-            
-            # Use pre-generated summary_message or construct one
-            display_msg = entry_orm.summary_message
-            if not display_msg: # Fallback message construction if summary_message is None
-                # This part requires fetching details of target_bill, target_payment, target_user names
-                # to make a good message. This can get complex here if not pre-generated.
-                # For now, let's assume summary_message is always populated by the action that created the log.
-                actor_name_str = actor_model.username if actor_model and actor_model.username else "System"
-                display_msg = f"{actor_name_str} performed action: {entry_orm.action_type.value}"
-                if entry_orm.target_bill_id: display_msg += f" on bill {entry_orm.target_bill_id}"
-                if entry_orm.target_payment_id: display_msg += f" on payment {entry_orm.target_payment_id}"
-                if entry_orm.target_user_id: 
-                    target_user_model = user_models_map.get(entry_orm.target_user_id)
-                    target_user_name_str = target_user_model.username if target_user_model and target_user_model.username else f"user {entry_orm.target_user_id}"
-                    display_msg += f" affecting {target_user_name_str}"
-
-
-            response_activities.append(AuditLogEntryResponse(
-                id=entry_orm.id,
-                timestamp=entry_orm.timestamp,
-                action_type=entry_orm.action_type,
-                actor_user=actor_schema,
-                display_message=display_msg,
-                group_id=entry_orm.group_id, # Should always be the same as path group_id
-                target_bill_id=entry_orm.target_bill_id,
-                target_payment_id=entry_orm.target_payment_id,
-                target_user_id=entry_orm.target_user_id
-            ))
-            
-        return GroupActivityFeedResponse(group_id=group_id, activities=response_activities)
+            if entry.actor and entry.actor.user_id not in actor_dicts:
+                actor_dicts[entry.actor.user_id] = user_to_schema(entry.actor).model_dump()
+
+        # Every field comes straight from DB rows, so entries are shaped as plain dicts
+        # in the AuditLogEntryResponse layout and encoded by orjson without a pydantic pass
+        activities = [
+            {
+                "id": entry_orm.id,
+                "timestamp": entry_orm.timestamp,
+                "action_type": entry_orm.action_type.value,
+                "actor_user": actor_dicts[entry_orm.actor.user_id] if entry_orm.actor else None,
+                "display_message": entry_orm.summary_message or _audit_fallback_message(entry_orm),
+                "group_id": entry_orm.group_id, # Should always be the same as path group_id
+                "target_bill_id": entry_orm.target_bill_id,
+                "target_payment_id": entry_orm.target_payment_id,
+                "target_user_id": entry_orm.target_user_id,
+            }
+            for entry_orm in audit_entries
+        ]
+        return Response(
+            content=orjson.dumps({"group_id": group_id, "activities": activities}),
+            media_type="application/json",
+        )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Unexpected error fetching audit activity feed for group {group_id} by user {user_id}: {e}")
+        logger.exception("Unexpected error fetching audit activity feed for group %s by user %s: %s", group_id, user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while fetching group activity.",
@@ -585,27 +606,29 @@ async def edit_group_details(
     db: DbSessionDep,
     current_user: User = Depends(get_current_user),
 ):
-    logger.info(f"User {current_user.user_id} attempting to update group {group_id} with data: {group_update_data.model_dump(exclude_unset=True)}")
+    update_fields = group_update_data.model_dump(exclude_unset=True)
+    logger.info("User %s attempting to update group %s with data: %s", current_user.user_id, group_id, update_fields)
+
+    # Checked before any query: an empty body is rejected without a DB round-trip
+    if not update_fields:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No update data provided."
+        )
 
     requester_role = await get_user_role_in_group(db=db, user_id=current_user.user_id, group_id=group_id)
 
     if requester_role not in {GroupRole.owner, GroupRole.admin}:
-        logger.warning(f"User {current_user.user_id} (role: {requester_role}) forbidden to update group {group_id}.")
+        logger.warning("User %s (role: %s) forbidden to update group %s.", current_user.user_id, requester_role, group_id)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this group. Must be an admin or owner."
         )
-    
-    if not group_update_data.model_dump(exclude_unset=True):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No update data provided."
-        )
 
     try:
-        updated_db_group = await update_group(db=db, group_id=group_id, group_update=group_update_data)
+        updated_db_group = await update_group(db=db, group_id=group_id, update_data=update_fields)
         if updated_db_group is None:
-            logger.warning(f"Update failed: Group {group_id} not found during update attempt by user {current_user.user_id}.")
+            logger.warning("Update failed: Group %s not found during update attempt by user %s.", group_id, current_user.user_id)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
 
         await record_group_activity(
@@ -616,19 +639,19 @@ async def edit_group_details(
         )
         
         await db.commit()
-        await db.refresh(updated_db_group)
+        await bump_group_version(group_id)
         
-        logger.info(f"User {current_user.user_id} successfully updated group {group_id}.")
+        logger.info("User %s successfully updated group %s.", current_user.user_id, group_id)
         return updated_db_group
     except IntegrityError as e: # Catch potential unique constraint violations if renaming, etc.
-        logger.warning(f"IntegrityError by user {current_user.user_id} updating group {group_id}: {e}")
+        logger.warning("IntegrityError by user %s updating group %s: %s", current_user.user_id, group_id, e)
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to update group. Potential conflict: {e.orig}"
+            detail="Failed to update group. Potential conflict with existing data."
         ) from e
     except Exception as e:
-        logger.exception(f"Unexpected error by user {current_user.user_id} updating group {group_id}")
+        logger.exception("Unexpected error by user %s updating group %s", current_user.user_id, group_id)
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -655,14 +678,16 @@ async def get_pending_group_invitations(
     Retrieves a list of users who have been invited to the group but have not yet responded.
     Only accessible to members of the group.
     """
-    logger.info(f"User {current_user.user_id} fetching pending invitations for group {group_id}")
+    logger.info("User %s fetching pending invitations for group %s", current_user.user_id, group_id)
     try:
         pending_invitations = await get_pending_invitations_for_group(db=db, group_id=group_id)
-        logger.info(f"User {current_user.user_id} successfully fetched {len(pending_invitations)} pending invitations for group {group_id}")
-        return pending_invitations
+        logger.info("User %s successfully fetched %s pending invitations for group %s", current_user.user_id, len(pending_invitations), group_id)
+        # Validate once and write JSON with pydantic-core; a returned Response skips response_model re-validation
+        invitation_list = _GROUP_INVITATION_LIST_ADAPTER.validate_python(pending_invitations)
+        return Response(content=_GROUP_INVITATION_LIST_ADAPTER.dump_json(invitation_list), media_type="application/json")
     
     except Exception as e:
-        logger.exception(f"Error fetching pending invitations for group {group_id}: {e}")
+        logger.exception("Error fetching pending invitations for group %s: %s", group_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not retrieve pending invitations."
@@ -670,6 +695,12 @@ async def get_pending_group_invitations(
 
 
 @router.get("/{group_id}/user-role", response_model=UserRoleResponse)
+@cache(
+    expire=GROUP_CACHE_EXPIRE_SECONDS,
+    namespace=GROUP_CACHE_NAMESPACE,
+    key_builder=group_user_key_builder,
+    coder=JsonResponseCoder,
+)
 async def get_user_role_endpoint(
     group_id: int,
     db: DbSessionDep,
@@ -678,26 +709,26 @@ async def get_user_role_endpoint(
     """
     Returns the role of the current user in a specific group.
     """
-    logger.info(f"User {current_user.user_id} checking their role for group {group_id}")
+    logger.info("User %s checking their role for group %s", current_user.user_id, group_id)
 
     try:
         user_role = await get_user_role_in_group(db=db, user_id=current_user.user_id, group_id=group_id)
 
         if user_role is None:
-            logger.warning(f"User {current_user.user_id} is not a member of group {group_id}, role check failed.")
+            logger.warning("User %s is not a member of group %s, role check failed.", current_user.user_id, group_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found in this group."
             )
         
-        logger.info(f"Role for user {current_user.user_id} in group {group_id} is {user_role.value}")
-        return UserRoleResponse(role=user_role)
+        logger.info("Role for user %s in group %s is %s", current_user.user_id, group_id, user_role.value)
+        return Response(content=UserRoleResponse(role=user_role).model_dump_json(), media_type="application/json")
 
     except HTTPException:
         raise # Re-raise HTTPException directly to preserve its status code and detail
 
     except Exception as e:
-        logger.exception(f"Unexpected error checking role for user {current_user.user_id} in group {group_id}")
+        logger.exception("Unexpected error checking role for user %s in group %s", current_user.user_id, group_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while checking user role."
@@ -712,17 +743,20 @@ async def get_user_role_in_group_endpoint(
     current_user: User = Depends(get_current_user), # Ensures caller is authenticated
 ):
     """Get a user's role in a specific group."""
+    # Requester's and target's memberships in one round-trip
+    memberships = await get_group_members_with_users_by_ids(db, group_id=group_id, user_ids={user_id, current_user.user_id})
+
+    # Ensure the current_user (the one making the request) is a member of the group,
+    # before revealing anything about the target's membership
+    if current_user.user_id not in memberships:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not authorized to view information about this group.")
+
     # Ensure the user whose role is being requested is in the group
-    role = await get_user_role_in_group(db, user_id=user_id, group_id=group_id)
-    if role is None:
+    target_membership = memberships.get(user_id)
+    if target_membership is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User is not a member of this group.")
-    
-    # Ensure the current_user (the one making the request) is a member of the group
-    is_requester_member = await is_member_of_group(db, user_id=current_user.user_id, group_id=group_id)
-    if not is_requester_member:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not authorized to view information about this group.")
 
-    return UserRoleResponse(role=role)
+    return UserRoleResponse(role=target_membership.role)
 
 
 @router.put("/{group_id}/members/{user_id}/role", response_model=GroupMember)
@@ -743,24 +777,23 @@ async def update_member_role_endpoint(
     new_role = role_update.role
 
     # --- Authorization ---
-    requester_membership = await get_group_member_with_user(db, group_id=group_id, user_id=requester_id)
-    target_membership = await get_group_member_with_user(db, group_id=group_id, user_id=user_id)
+    # Both memberships, with users, in one query; the role helpers below reuse them from the session
+    memberships = await get_group_members_with_users_by_ids(db, group_id=group_id, user_ids={requester_id, user_id})
+    requester_membership = memberships.get(requester_id)
+    target_membership = memberships.get(user_id)
 
     if not requester_membership or not target_membership:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Member not found in this group.")
 
     requester_role = requester_membership.role
     target_role = target_membership.role
-    
-    # Define role hierarchy
-    role_hierarchy = {models.GroupRole.owner: 2, models.GroupRole.admin: 1, models.GroupRole.member: 0}
 
     # Rule: Cannot change your own role
     if requester_id == user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You cannot change your own role.")
 
     # Rule: Requester must have a higher role than the target to modify them
-    if role_hierarchy[requester_role] <= role_hierarchy[target_role]:
+    if requester_role.rank <= target_role.rank:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only manage members with a role lower than your own.")
 
     # Rule: The new role must be different and cannot be higher than the requester's role (except for owner swap)
@@ -795,14 +828,16 @@ async def update_member_role_endpoint(
             )
 
             await db.commit()
+            await invalidate_cached_membership(group_id, requester_id, user_id)
+            await bump_group_version(group_id)
             return updated_membership
         except Exception as e:
             await db.rollback()
-            logger.exception(f"Error during owner swap between {requester_id} and {user_id} in group {group_id}: {e}")
+            logger.exception("Error during owner swap between %s and %s in group %s: %s", requester_id, user_id, group_id, e)
             raise HTTPException(status_code=500, detail="An unexpected error occurred during the owner swap.")
 
     # --- Standard Promotion/Demotion ---
-    if role_hierarchy[new_role] >= role_hierarchy[requester_role]:
+    if new_role.rank >= requester_role.rank:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You cannot promote a member to your own role or higher.")
 
     try:
@@ -810,7 +845,7 @@ async def update_member_role_endpoint(
         if not updated_membership:
             raise # Should be caught by the general exception handler
 
-        action_type = models.AuditActionType.member_role_promoted if role_hierarchy[new_role] > role_hierarchy[target_role] else models.AuditActionType.member_role_demoted
+        action_type = models.AuditActionType.member_role_promoted if new_role.rank > target_role.rank else models.AuditActionType.member_role_demoted
 
         await record_group_activity(
             db=db,
@@ -821,12 +856,13 @@ async def update_member_role_endpoint(
             target_role=new_role
         )
         await db.commit()
-        
-        # We need to eager load the user for the response model
-        final_membership = await get_group_member_with_user(db, group_id=group_id, user_id=user_id)
-        return final_membership
+        await invalidate_cached_membership(group_id, user_id)
+        await bump_group_version(group_id)
+
+        # Same identity as target_membership, whose user is already loaded for the response model
+        return updated_membership
 
     except Exception as e:
         await db.rollback()
-        logger.exception(f"Error updating role for user {user_id} in group {group_id}: {e}")
+        logger.exception("Error updating role for user %s in group %s: %s", user_id, group_id, e)
         raise HTTPException(status_code=500, detail="Could not update member role.")
\ No newline at end of file
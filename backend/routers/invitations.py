@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Path
+from fastapi import APIRouter, Depends, status, HTTPException, Path, Response
 from sqlalchemy.exc import IntegrityError
+from pydantic import TypeAdapter
 import logging
 from datetime import datetime, timezone
 
@@ -8,9 +9,13 @@ from backend.database import DbSessionDep
 from backend.dependencies import get_current_user
 from backend.models import GroupRole, AuditActionType, GroupInvitationStatus, NotificationType
 from backend.services.audit_service import record_group_activity
+from backend.services.balance_service import invalidate_group_balances
+from backend.services.group_cache_service import bump_group_version
 
 logger = logging.getLogger(__name__)
 
+_INVITATION_INFO_LIST_ADAPTER = TypeAdapter(list[schemas.GroupInvitationInfo])
+
 router = APIRouter(
     prefix="/invitations",
     tags=["group-invitations"],
@@ -29,31 +34,35 @@ async def send_group_invitation(
     invitee_id = invitation.invitee_id
     logger.info(f"User {inviter_id} attempting to invite user {invitee_id} to group {group_id}")
 
+    # Inviter role, invitee, invitee membership and any earlier invitation in one round-trip
+    inviter_role, invitee, invitee_is_member, existing_invitation = await crud.get_group_invitation_preconditions(
+        db, group_id=group_id, inviter_id=inviter_id, invitee_id=invitee_id
+    )
+
     # Authorization: Check if inviter is an owner or admin of the group
-    inviter_role = await crud.get_user_role_in_group(db, user_id=inviter_id, group_id=group_id)
     if not inviter_role or inviter_role not in [GroupRole.owner, GroupRole.admin]:
         logger.warning(f"Authorization failed: User {inviter_id} with role {inviter_role} tried to invite to group {group_id}.")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to invite users to this group.")
 
     # Check if invitee exists
-    invitee = await crud.get_user_by_user_id(db, user_id=invitation.invitee_id)
     if not invitee:
         logger.warning(f"Invitation failed: Invitee user {invitee_id} not found (sent by {inviter_id}).")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User to invite not found.")
 
     # Check if user is already a member
-    if await crud.is_member_of_group(db, user_id=invitee_id, group_id=group_id):
+    if invitee_is_member:
         logger.warning(f"Invitation failed: User {invitee_id} is already a member of group {group_id} (sent by {inviter_id}).")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User is already a member of this group.")
 
     try:
-        # Check for an existing invitation
-        existing_invitation = await crud.get_invitation_by_group_and_invitee(db, group_id=group_id, invitee_id=invitee_id)
+        if existing_invitation and existing_invitation.status == GroupInvitationStatus.pending:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A pending invitation already exists for this user and group.")
+
+        # Read before any row is added, so the invitation, audit entry and notification
+        # below are all written in one flush instead of being autoflushed piecemeal
+        group = await crud.get_group(db, group_id=group_id) # Fetch group for name
 
         if existing_invitation:
-            if existing_invitation.status == GroupInvitationStatus.pending:
-                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A pending invitation already exists for this user and group.")
-            
             # If invitation was declined or accepted (and user left), "resend" it by updating it
             existing_invitation.status = GroupInvitationStatus.pending
             existing_invitation.created_at = datetime.now(timezone.utc)
@@ -75,29 +84,25 @@ async def send_group_invitation(
         )
         
         # --- Create Notification for the Invitee ---
-        group = await crud.get_group(db, group_id=group_id) # Fetch group for name
         if group:
             await crud.create_notification(
                 db=db,
                 recipient_user_id=invitee_id,
                 notification_type=NotificationType.group_invite,
-                message=f"{current_user.full_name or current_user.username} invited you to join the group '{group.group_name}'.",
+                message=f"{current_user.display_name} invited you to join the group '{group.group_name}'.",
                 related_group_id=group_id,
                 related_user_id=inviter_id
             )
         # --- End Notification ---
 
         await db.commit()
-        
-        # After commit, re-fetch the invitation using the function that loads all relationships
-        final_invitation = await crud.get_group_invitation_by_id(db, invitation_id=invitation_to_return.invitation_id)
 
-        if not final_invitation:
-            logger.error(f"Could not retrieve new invitation for user {invitee_id} in group {group_id} after creation.")
-            raise HTTPException(status_code=500, detail="Failed to retrieve invitation details after creation.")
+        # Only the server-set timestamps are unknown; the group (with members), inviter and
+        # invitee rows were loaded above, so the relationships resolve from the session
+        await db.refresh(invitation_to_return, ["created_at", "updated_at", "group", "inviter", "invitee"])
 
-        logger.info(f"User {inviter_id} successfully invited user {invitee_id} to group {group_id}. Invitation ID: {final_invitation.invitation_id}")
-        return final_invitation
+        logger.info(f"User {inviter_id} successfully invited user {invitee_id} to group {group_id}. Invitation ID: {invitation_to_return.invitation_id}")
+        return invitation_to_return
         
     except IntegrityError as e: # Keep as a fallback, though less likely to be hit
         logger.warning(f"Invitation failed: IntegrityError (likely duplicate) when inviting {invitee_id} to group {group_id} by {inviter_id}.")
@@ -121,7 +126,10 @@ async def get_my_pending_invitations(
     logger.info(f"User {current_user.user_id} fetching their pending group invitations.")
     try:
         invitations = await crud.get_pending_invitations_for_user(db, user_id=current_user.user_id)
-        return invitations
+        return Response(
+            content=_INVITATION_INFO_LIST_ADAPTER.dump_json(_INVITATION_INFO_LIST_ADAPTER.validate_python(invitations)),
+            media_type="application/json",
+        )
     except Exception as e:
         logger.exception(f"Error fetching pending invitations for user {current_user.user_id}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch pending invitations.")
@@ -151,14 +159,20 @@ async def respond_to_group_invitation(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status. Must be 'accepted' or 'declined'.")
 
     try:
-        await crud.update_group_invitation(db, db_invitation=invitation, inv_up=response)
+        updated = await crud.update_group_invitation(db, db_invitation=invitation, inv_up=response)
+        if not updated:
+            # Another request responded to it since it was read above
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="This invitation has already been responded to.")
         await db.commit()
-        
-        # Re-fetch the invitation to get the fully loaded object for the response
-        final_invitation = await crud.get_group_invitation_by_id(db, invitation_id=invitation_id)
+        if response.status == schemas.GroupInvitationStatus.accepted:
+            await invalidate_group_balances(invitation.group_id)
+            await bump_group_version(invitation.group_id)
 
+        # The loaded invitation, including the group's new member, was kept in step with the writes
         logger.info(f"User {current_user.user_id} successfully responded to invitation {invitation_id} with status '{response.status.value}'.")
-        return final_invitation
+        return invitation
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Error responding to group invitation {invitation_id} for user {current_user.user_id}: {e}")
         await db.rollback()
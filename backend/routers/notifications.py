@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 import logging
+from pydantic import TypeAdapter
 
 from backend.crud import (
-    get_notifications_for_user, get_notification_by_id_for_user,
-    mark_notification_as_read, mark_all_notifications_as_read, get_unread_notification_count
+    get_notifications_for_user, get_notifications_page_for_user, get_notification_by_id_for_user,
+    mark_notification_as_read, mark_all_notifications_as_read, get_unread_notification_count,
+    get_notification_state
 )
 
 import backend.schemas as schemas
@@ -14,9 +17,20 @@ from backend.dependencies import (
     get_current_user,
 )
 from backend.services import payment_services
+from backend.services.http_cache import etag_matches
+from backend.services.notification_stream import subscribe, is_streaming_enabled
 
 logger = logging.getLogger(__name__)
 
+# Built once at import; validating whole lists runs in pydantic-core instead of a Python loop
+_NOTIFICATION_LIST_ADAPTER = TypeAdapter(list[schemas.Notification])
+
+# Pollers must revalidate, but get a bodiless 304 while their copy still matches
+_NOTIFICATION_CACHE_CONTROL = "private, no-cache"
+
+# Comment line sent on an idle stream so proxies don't close it
+_STREAM_KEEPALIVE_SECONDS = 15
+
 
 router = APIRouter(
     prefix="/notifications",
@@ -26,29 +40,85 @@ router = APIRouter(
 
 @router.get("/me", response_model=List[schemas.Notification])
 async def read_my_notifications(
+    request: Request,
     db: DbSessionDep,
     current_user: models.User = Depends(get_current_user),
     skip: int = Query(0, ge=0, description="Number of notifications to skip"),
     limit: int = Query(20, ge=1, le=100, description="Maximum number of notifications to return"),
-    unread_only: bool = Query(False, description="Filter by unread notifications only")
+    unread_only: bool = Query(False, description="Filter by unread notifications only"),
+    before_id: Optional[int] = Query(
+        None,
+        ge=1,
+        description="id of the last notification on the previous page; when set, skip is ignored.",
+    ),
 ):
     """
     Retrieve notifications for the current authenticated user.
+    Supports If-None-Match: unchanged notifications are answered with 304.
     """
-    logger.info(f"User {current_user.user_id} fetching their notifications (unread_only: {unread_only}).")
+    logger.info("User %s fetching their notifications (unread_only: %s).", current_user.user_id, unread_only)
     try:
+        latest_id, unread_count = await get_notification_state(db=db, user_id=current_user.user_id)
+        etag = f'"n-{latest_id}-{unread_count}-{skip}-{limit}-{int(unread_only)}-{before_id}"'
+        if etag_matches(request, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": _NOTIFICATION_CACHE_CONTROL},
+            )
+
         notifications = await get_notifications_for_user(
             db=db, 
             user_id=current_user.user_id, 
             skip=skip, 
             limit=limit, 
-            unread_only=unread_only
+            unread_only=unread_only,
+            before_id=before_id,
+        )
+
+        # Returned directly, so the headers go on this response rather than the injected one
+        return Response(
+            content=_NOTIFICATION_LIST_ADAPTER.dump_json(_NOTIFICATION_LIST_ADAPTER.validate_python(notifications)),
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": _NOTIFICATION_CACHE_CONTROL},
         )
-        
-        return notifications
     
     except Exception as e:
-        logger.exception(f"Error fetching notifications for user {current_user.user_id}: {e}")
+        logger.exception("Error fetching notifications for user %s: %s", current_user.user_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not retrieve notifications."
+        ) from e
+
+
+@router.get(
+    "/me/page",
+    response_model=schemas.NotificationPage,
+    summary="Get notifications together with the unread count"
+)
+async def read_my_notifications_page(
+    db: DbSessionDep,
+    current_user: models.User = Depends(get_current_user),
+    skip: int = Query(0, ge=0, description="Number of notifications to skip"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of notifications to return"),
+    unread_only: bool = Query(False, description="Filter by unread notifications only")
+):
+    """
+    Retrieve a page of notifications and the total unread count in one request,
+    replacing separate calls to /me and /me/unread-count.
+    """
+    logger.info("User %s fetching their notifications page (unread_only: %s).", current_user.user_id, unread_only)
+    try:
+        notifications, unread_count = await get_notifications_page_for_user(
+            db=db,
+            user_id=current_user.user_id,
+            skip=skip,
+            limit=limit,
+            unread_only=unread_only
+        )
+        return schemas.NotificationPage(items=notifications, unread_count=unread_count)
+
+    except Exception as e:
+        logger.exception("Error fetching notifications page for user %s: %s", current_user.user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not retrieve notifications."
@@ -68,7 +138,7 @@ async def mark_notification_as_read_endpoint(
     """
     Mark a specific notification as read for the current user.
     """
-    logger.info(f"User {current_user.user_id} attempting to mark notification {notification_id} as read.")
+    logger.info("User %s attempting to mark notification %s as read.", current_user.user_id, notification_id)
     
     try:
         # Get the notification
@@ -77,20 +147,20 @@ async def mark_notification_as_read_endpoint(
         )
         if not db_notification:
             logger.warning(
-                f"User {current_user.user_id} tried to mark non-existent or unauthorized notification {notification_id} as read."
+                "User %s tried to mark non-existent or unauthorized notification %s as read.", current_user.user_id, notification_id
             )
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found or not yours.")
 
         # Mark as read
         if db_notification.is_read:
-            logger.info(f"Notification {notification_id} was already read by user {current_user.user_id}.")
+            logger.info("Notification %s was already read by user %s.", notification_id, current_user.user_id)
             return db_notification # Return as is, no change needed
 
         updated_notification = await mark_notification_as_read(
             db=db, db_notification=db_notification
         )
         
-        logger.info(f"User {current_user.user_id} successfully marked notification {notification_id} as read.")
+        logger.info("User %s successfully marked notification %s as read.", current_user.user_id, notification_id)
         return updated_notification
 
     except HTTPException:
@@ -98,7 +168,7 @@ async def mark_notification_as_read_endpoint(
     
     except Exception as e:
         logger.exception(
-            f"Error marking notification {notification_id} as read for user {current_user.user_id}: {e}"
+            "Error marking notification %s as read for user %s: %s", notification_id, current_user.user_id, e
         )
         # CRUD should handle rollback for db.commit errors
         raise HTTPException(
@@ -116,15 +186,15 @@ async def mark_all_my_notifications_as_read(
     db: DbSessionDep,
     current_user: models.User = Depends(get_current_user),
 ):
-    logger.info(f"User {current_user.user_id} attempting to mark all their notifications as read.")
+    logger.info("User %s attempting to mark all their notifications as read.", current_user.user_id)
     try:
         updated_count = await mark_all_notifications_as_read(
             db=db, user_id=current_user.user_id
         )
-        logger.info(f"User {current_user.user_id} marked {updated_count} notifications as read.")
+        logger.info("User %s marked %s notifications as read.", current_user.user_id, updated_count)
 
     except Exception as e:
-        logger.exception(f"Error marking all notifications as read for user {current_user.user_id}: {e}")
+        logger.exception("Error marking all notifications as read for user %s: %s", current_user.user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not mark all notifications as read."
@@ -137,19 +207,76 @@ async def mark_all_my_notifications_as_read(
     summary="Get count of unread notifications"
 )
 async def get_my_unread_notification_count(
+    request: Request,
+    response: Response,
     db: DbSessionDep,
     current_user: models.User = Depends(get_current_user),
 ):
-    logger.debug(f"User {current_user.user_id} fetching unread notification count.")
+    logger.debug("User %s fetching unread notification count.", current_user.user_id)
     try:
         count = await get_unread_notification_count(
             db=db, user_id=current_user.user_id
         )
+        etag = f'"unread-{count}"'
+        if etag_matches(request, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": _NOTIFICATION_CACHE_CONTROL},
+            )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = _NOTIFICATION_CACHE_CONTROL
         return schemas.UnreadNotificationCount(unread_count=count)
     
     except Exception as e:
-        logger.exception(f"Error fetching unread notification count for user {current_user.user_id}: {e}")
+        logger.exception("Error fetching unread notification count for user %s: %s", current_user.user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not retrieve unread notification count."
-        ) from e
\ No newline at end of file
+        ) from e
+
+
+@router.get(
+    "/stream",
+    summary="Stream new notifications (Server-Sent Events)",
+    responses={503: {"description": "Streaming is not enabled; keep polling"}},
+)
+async def stream_my_notifications(
+    request: Request,
+    db: DbSessionDep,
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Pushes each new notification for the current user as a `notification` event,
+    so clients can stop polling /me and /me/unread-count.
+    Streaming needs Redis (REDIS_URL) to reach every instance; without it this
+    answers 503 and clients must keep polling.
+    """
+    user_id = current_user.user_id
+    if not is_streaming_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Notification streaming is not enabled. Poll /notifications/me/unread-count instead.",
+        )
+    logger.info("User %s opened a notification stream.", user_id)
+    # The stream can stay open for hours; don't hold a pooled connection for it
+    await db.close()
+
+    async def event_source():
+        events = subscribe(user_id, idle_seconds=_STREAM_KEEPALIVE_SECONDS)
+        try:
+            async for payload in events:
+                if await request.is_disconnected():
+                    break
+                if payload is None:
+                    yield b": keepalive\n\n"
+                else:
+                    yield b"event: notification\ndata: " + payload + b"\n\n"
+        finally:
+            await events.aclose()
+            logger.info("User %s closed their notification stream.", user_id)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -25,6 +25,7 @@ from backend.dependencies import (
 )
 from backend.services.audit_service import record_group_activity
 from backend.services.payment_services import validate_payer_payee
+from backend.services.balance_service import invalidate_group_balances
 
 
 logger = logging.getLogger(__name__)
@@ -121,7 +122,8 @@ async def create_new_payment(
             target_user_membership_related=payee
         )
 
-        db.commit()
+        await db.commit()
+        await invalidate_group_balances(group_id)
 
         final_payment = await get_payment(
             db=db,
@@ -299,6 +301,7 @@ async def delete_payment_endpoint(
             )
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment not found or failed to delete.")
 
+        await invalidate_group_balances(group_id)
         logger.info(f"User {requester_user_id} successfully deleted payment {payment_id}.")
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -351,6 +354,7 @@ async def update_payment_endpoint(
             db_payment=db_payment,
             payment_in=payment_update_data
         )
+        await invalidate_group_balances(group_id)
 
         payment = await get_payment(
             db=db,
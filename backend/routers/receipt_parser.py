@@ -193,7 +193,7 @@ async def parse_receipt_image(
         logger.debug(f"Cleaned JSON for user {user_id}:\n---START---\n{cleaned_json_str}\n---END---")
         
         # Parse the JSON string into our Pydantic model
-        parsed_data = ParsedReceipt.parse_raw(cleaned_json_str)
+        parsed_data = ParsedReceipt.model_validate_json(cleaned_json_str)
         # Add the image URL to the response
         parsed_data.image_url = image_url
         logger.info(f"Successfully parsed AI response into Pydantic model for user {user_id}.")
@@ -14,11 +14,13 @@ from backend.crud import (
     get_user_by_user_id,
     update_user_profile_image,
     get_user_by_username,
+    get_user_group_ids,
 )
 from backend.schemas import User
-from backend.dependencies import get_current_user
+from backend.dependencies import get_current_user, invalidate_cached_user
 from backend.database import DbSessionDep
 from backend.services.storage_service import upload_file_to_gcs
+from backend.services.balance_service import invalidate_group_balances
 
 logger = logging.getLogger(__name__)
 
@@ -79,11 +81,17 @@ async def update_current_user_profile(
                 detail="Username already taken",
             )
 
+    old_username = current_user.username
     try:
         updated_user = await update_user(
             db=db, db_user=current_user, user_in=user_update_data
         )
         await db.commit()
+        await invalidate_cached_user(current_user.user_id)
+        if new_username and new_username != old_username:
+            # Cached balance rows carry usernames
+            for group_id in await get_user_group_ids(db, user_id=current_user.user_id):
+                await invalidate_group_balances(group_id)
         await db.refresh(updated_user)
         logger.info(f"User {updated_user.user_id} successfully updated their profile.")
         return updated_user
@@ -132,6 +140,7 @@ async def update_profile_image(
         )
 
         await db.commit()
+        await invalidate_cached_user(current_user.user_id)
         await db.refresh(updated_user)
 
         logger.info(f"User {current_user.user_id} successfully updated profile image.")
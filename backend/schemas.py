@@ -525,6 +525,12 @@ class UnreadNotificationCount(BaseModel):
     unread_count: int
 
 
+class NotificationPage(BaseModel):
+    """A page of the user's notifications together with their total unread count."""
+    items: list[Notification]
+    unread_count: int
+
+
 # Audit log
 class AuditLogEntryResponse(BaseModel):
     """
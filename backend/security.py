@@ -1,8 +1,16 @@
 import os
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer
 
-from jose import JWTError, jwt
+from jose import ExpiredSignatureError, JWTError, jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
 
@@ -20,7 +28,34 @@ GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000") 
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Precomputed pieces for HMAC-signed tokens so encoding is a single HMAC over the payload
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _b64url(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+
+_SIGNING_DIGEST = _HMAC_DIGESTS.get(ALGORITHM)
+_SIGNING_KEY = SECRET_KEY.encode("utf-8") if SECRET_KEY else None
+_HEADER_B64 = _b64url(json.dumps({"alg": ALGORITHM, "typ": "JWT"}, separators=(",", ":")).encode("utf-8"))
+
+
+# New hashes use Argon2id; existing bcrypt hashes still verify and are upgraded on login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=65536,
+    argon2__parallelism=1,
+)
+
+# Password hashing is pure CPU work: run it on a pool sized to the cores, not on the event loop
+# or Starlette's shared threadpool, and shed load once every slot plus a short queue is busy.
+_HASH_WORKERS = os.cpu_count() or 1
+_password_hash_pool = ThreadPoolExecutor(max_workers=_HASH_WORKERS, thread_name_prefix="password-hash")
+_password_hash_slots = asyncio.Semaphore(_HASH_WORKERS * 2)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login/token")
 
@@ -31,10 +66,34 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verifies a password and returns a replacement hash if the stored one uses a deprecated scheme."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str):
     return pwd_context.hash(password)
 
 
+async def _run_password_hashing(func, *args):
+    if _password_hash_slots.locked():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests. Please try again shortly.",
+        )
+    async with _password_hash_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_hash_pool, func, *args)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await _run_password_hashing(verify_and_update_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_hashing(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta: 
@@ -43,5 +102,65 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire})
-    encode_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encode_jwt
\ No newline at end of file
+    if _SIGNING_DIGEST is None or _SIGNING_KEY is None:
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+    # Same claim handling as jose: datetimes become integer timestamps
+    for claim in ("exp", "iat", "nbf"):
+        if isinstance(to_encode.get(claim), datetime):
+            to_encode[claim] = int(to_encode[claim].timestamp())
+
+    payload_b64 = _b64url(json.dumps(to_encode, separators=(",", ":")).encode("utf-8"))
+    signing_input = _HEADER_B64 + b"." + payload_b64
+    signature = hmac.new(_SIGNING_KEY, signing_input, _SIGNING_DIGEST).digest()
+    return (signing_input + b"." + _b64url(signature)).decode("ascii")
+
+
+def _b64url_decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verifies a token issued by create_access_token with the precomputed key.
+    Tokens with any other header go through jose; failures raise JWTError either way.
+    """
+    if _SIGNING_DIGEST is None or _SIGNING_KEY is None:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    try:
+        raw = token.encode("ascii")
+        signing_input, signature_b64 = raw.rsplit(b".", 1)
+        header_b64, payload_b64 = signing_input.split(b".", 1)
+    except (UnicodeEncodeError, ValueError):
+        raise JWTError("Malformed token")
+
+    if header_b64 != _HEADER_B64:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    try:
+        signature = _b64url_decode(signature_b64)
+        expected = hmac.new(_SIGNING_KEY, signing_input, _SIGNING_DIGEST).digest()
+        if not hmac.compare_digest(signature, expected):
+            raise JWTError("Signature verification failed.")
+        payload = json.loads(_b64url_decode(payload_b64))
+    except (binascii.Error, ValueError):
+        raise JWTError("Malformed token")
+
+    if not isinstance(payload, dict):
+        raise JWTError("Invalid payload")
+
+    now = datetime.now(timezone.utc).timestamp()
+    exp = payload.get("exp")
+    if exp is not None:
+        if not isinstance(exp, (int, float)):
+            raise JWTError("Expiration Time claim (exp) must be an integer.")
+        if exp <= now:
+            raise ExpiredSignatureError("Signature has expired.")
+    nbf = payload.get("nbf")
+    if nbf is not None:
+        if not isinstance(nbf, (int, float)):
+            raise JWTError("Not Before claim (nbf) must be an integer.")
+        if nbf > now:
+            raise JWTError("The token is not yet valid (nbf)")
+    return payload
@@ -0,0 +1,84 @@
+import hashlib
+from decimal import Decimal
+from typing import Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.coder import PickleCoder
+
+from backend.crud import get_group_net_balance_rows
+from backend.schemas import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+NET_BALANCES_CACHE_EXPIRE_SECONDS = 300
+# An in-memory backend is per process, so invalidations don't reach other instances;
+# their copies must age out quickly instead
+NET_BALANCES_LOCAL_CACHE_EXPIRE_SECONDS = 15
+
+
+def _net_balances_key(group_id: int) -> str:
+    return f"{FastAPICache.get_prefix()}:net-balances:{group_id}"
+
+
+async def get_cached_group_net_balance_rows(
+    db: AsyncSession, group_id: int
+) -> list[tuple[int, Optional[str], Decimal]]:
+    """
+    Shared by the balance and settlement endpoints so repeat reads skip the ledger aggregation.
+    Entries are dropped by invalidate_group_balances whenever bills, payments, membership
+    or a member's username change.
+    """
+    try:
+        backend = FastAPICache.get_backend()
+        key = _net_balances_key(group_id)
+        cached = await backend.get(key)
+    except Exception as e:
+        logger.warning(f"Net balance cache unavailable for group {group_id}: {e}")
+        return await get_group_net_balance_rows(db=db, group_id=group_id)
+
+    if cached is not None:
+        return PickleCoder.decode(cached)
+
+    rows = await get_group_net_balance_rows(db=db, group_id=group_id)
+    expire = (
+        NET_BALANCES_LOCAL_CACHE_EXPIRE_SECONDS if isinstance(backend, InMemoryBackend)
+        else NET_BALANCES_CACHE_EXPIRE_SECONDS
+    )
+    try:
+        await backend.set(key, PickleCoder.encode(rows), expire=expire)
+    except Exception as e:
+        logger.warning(f"Failed to cache net balances for group {group_id}: {e}")
+    return rows
+
+
+async def get_cached_group_net_balances(db: AsyncSession, group_id: int) -> dict[int, Decimal]:
+    rows = await get_cached_group_net_balance_rows(db=db, group_id=group_id)
+    return {user_id: net_amount for user_id, _, net_amount in rows}
+
+
+async def invalidate_group_balances(group_id: int) -> None:
+    """Call after committing any change to a group's bills, payments or members, or a member's username."""
+    try:
+        await FastAPICache.get_backend().clear(key=_net_balances_key(group_id))
+    except KeyError:
+        pass # Nothing cached for this group
+    except Exception as e:
+        logger.warning(f"Failed to invalidate net balance cache for group {group_id}: {e}")
+
+
+def net_balances_etag(
+    scope: str,
+    group_id: int,
+    rows: list[tuple[int, Optional[str], Decimal]],
+    users: Sequence[User] = (),
+) -> str:
+    """
+    ETag for a response derived from a group's net-balance rows.
+    The rows come from the cache, so repeat polls can be answered with 304 before any serialization.
+    Pass the users a response nests, so their profile changes also change the tag.
+    """
+    user_fields = [user.model_dump() for user in users]
+    digest = hashlib.blake2b(repr((scope, group_id, rows, user_fields)).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
@@ -0,0 +1,37 @@
+from typing import Any, Callable, Optional
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+
+from backend.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+BILL_CATEGORIES_CACHE_NAMESPACE = "bill-categories"
+# Without REDIS_URL the cache is in memory, per process, so invalidations don't reach other
+# instances; their copies must age out quickly instead. Fixed at import, like the @cache it feeds.
+BILL_CATEGORIES_CACHE_EXPIRE_SECONDS = 600 if settings.REDIS_URL else 15
+
+
+def bill_categories_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: tuple[Any, ...] = (),
+    kwargs: Optional[dict[str, Any]] = None,
+) -> str:
+    """Key only on group_id; the default builder also hashes the db session and user, so it never hits."""
+    return f"{namespace}:group:{kwargs['group_id']}"
+
+
+async def invalidate_group_bill_categories(group_id: int) -> None:
+    """Call after committing a bill create/update, which may add a category to the group."""
+    try:
+        key = f"{FastAPICache.get_prefix()}:{BILL_CATEGORIES_CACHE_NAMESPACE}:group:{group_id}"
+        await FastAPICache.get_backend().clear(key=key)
+    except KeyError:
+        pass # Nothing cached for this group
+    except Exception as e:
+        logger.warning(f"Failed to invalidate bill category cache for group {group_id}: {e}")
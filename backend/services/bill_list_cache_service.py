@@ -0,0 +1,33 @@
+from typing import Any, Callable, Optional
+from fastapi import Request, Response
+
+from backend.services.cache_versions import bump_version, get_version
+
+GROUP_BILLS_CACHE_NAMESPACE = "group-bills"
+GROUP_BILLS_CACHE_EXPIRE_SECONDS = 60
+
+
+async def group_bills_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: tuple[Any, ...] = (),
+    kwargs: Optional[dict[str, Any]] = None,
+) -> str:
+    """
+    Every page of a group's bill list shares the group's current version, so one bump
+    retires all of them. The list is the same for every member, so the user is not part of the key.
+    """
+    group_id = kwargs["group_id"]
+    version = await get_version(GROUP_BILLS_CACHE_NAMESPACE, group_id)
+    return (
+        f"{namespace}:{group_id}:v{version}:skip={kwargs['skip']}:limit={kwargs['limit']}"
+        f":before={kwargs.get('before_bill_id')}"
+    )
+
+
+async def bump_group_bills_version(group_id: int) -> None:
+    """Call after committing any create, update or delete of a bill in the group."""
+    await bump_version(GROUP_BILLS_CACHE_NAMESPACE, group_id)
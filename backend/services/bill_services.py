@@ -13,6 +13,10 @@ from backend.schemas import BillCreate, BillUpdate
 import backend.models as models
 from backend.models import SplitMethod, AuditActionType
 from backend.services.audit_service import record_group_activity
+from backend.services.balance_service import invalidate_group_balances
+from backend.services.bill_category_service import invalidate_group_bill_categories
+from backend.services.group_cache_service import bump_group_version
+from backend.services.bill_list_cache_service import bump_group_bills_version
 import logging
 
 logger = logging.getLogger(__name__)
@@ -88,8 +92,12 @@ async def update_bill_service(
         )
 
         await db.commit()
-        await db.refresh(updated_bill)
-        
+        await invalidate_group_balances(group_id)
+        await invalidate_group_bill_categories(group_id)
+        await bump_group_version(group_id) # Group responses embed its bill categories
+        await bump_group_bills_version(group_id)
+
+        # Callers reload the bill with its relationships for the response
         return updated_bill
 
     except IntegrityError as e:
@@ -135,6 +143,8 @@ async def delete_bill_service(
         )
 
         await db.commit()
+        await invalidate_group_balances(group_id)
+        await bump_group_bills_version(group_id)
         return True
 
     except IntegrityError as e:
@@ -0,0 +1,17 @@
+from fastapi import Response
+from fastapi_cache.coder import Coder
+
+
+class JsonResponseCoder(Coder):
+    """
+    Caches the body of a JSON Response as-is, so a hit is sent straight back
+    without decoding it and re-validating it against the response model.
+    """
+
+    @classmethod
+    def encode(cls, value: Response) -> bytes:
+        return bytes(value.body)
+
+    @classmethod
+    def decode(cls, value: bytes) -> Response:
+        return Response(content=value, media_type="application/json")
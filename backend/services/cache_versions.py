@@ -0,0 +1,36 @@
+import time
+from fastapi_cache import FastAPICache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A version per (kind, id), stored in the FastAPICache backend. Key builders embed the
+# current version, so one bump retires every cached entry built under the old one.
+# Must outlive every cached entry, otherwise an expired version could be reused
+_VERSION_EXPIRE_SECONDS = 24 * 60 * 60
+
+
+def _version_key(kind: str, entity_id: int) -> str:
+    return f"{FastAPICache.get_prefix()}:{kind}:version:{entity_id}"
+
+
+async def get_version(kind: str, entity_id: int) -> str:
+    try:
+        version = await FastAPICache.get_backend().get(_version_key(kind, entity_id))
+    except Exception as e:
+        logger.warning(f"Cache version {kind} unavailable for {entity_id}: {e}")
+        return "0"
+    if version is None:
+        return "0"
+    return version.decode() if isinstance(version, bytes) else str(version)
+
+
+async def bump_version(kind: str, entity_id: int) -> None:
+    try:
+        # A fresh timestamp rather than an increment: backends without INCR can't race on it
+        version = str(time.time_ns()).encode()
+        await FastAPICache.get_backend().set(
+            _version_key(kind, entity_id), version, expire=_VERSION_EXPIRE_SECONDS
+        )
+    except Exception as e:
+        logger.warning(f"Failed to bump cache version {kind} for {entity_id}: {e}")
@@ -0,0 +1,30 @@
+from typing import Any, Callable, Optional
+from fastapi import Request, Response
+
+from backend.services.cache_versions import bump_version, get_version
+
+GROUP_CACHE_NAMESPACE = "group"
+GROUP_CACHE_EXPIRE_SECONDS = 30
+
+
+async def group_user_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: tuple[Any, ...] = (),
+    kwargs: Optional[dict[str, Any]] = None,
+) -> str:
+    """
+    Per (endpoint, group, user) under the group's current version, so one bump retires
+    every cached view of the group. The user is part of the key because access and role differ per member.
+    """
+    group_id = kwargs["group_id"]
+    version = await get_version(GROUP_CACHE_NAMESPACE, group_id)
+    return f"{namespace}:{group_id}:v{version}:{func.__name__}:user:{kwargs['current_user'].user_id}"
+
+
+async def bump_group_version(group_id: int) -> None:
+    """Call after committing any change to a group's details, members, roles or bill categories."""
+    await bump_version(GROUP_CACHE_NAMESPACE, group_id)
@@ -0,0 +1,134 @@
+import asyncio
+from typing import Callable, Optional
+from cachetools import TTLCache
+from redis import asyncio as aioredis
+
+from backend.models import GroupRole
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Two levels for (group_id, user_id) -> role of confirmed memberships:
+# L1 is per process; L2 is Redis, shared by all workers, enabled by REDIS_URL.
+# Non-members aren't cached, so joining needs no invalidation; role changes and
+# removals call invalidate_cached_membership, which also purges other workers' L1 via pub/sub.
+# The same channel carries "user:<id>" entries for other per-process caches keyed by user;
+# see publish_user_invalidation.
+MEMBERSHIP_CACHE_TTL_SECONDS = 30
+MEMBERSHIP_REDIS_TTL_SECONDS = 60
+_INVALIDATION_CHANNEL = "membership-invalidations"
+
+_local_roles: TTLCache = TTLCache(maxsize=10_000, ttl=MEMBERSHIP_CACHE_TTL_SECONDS)
+_redis: Optional[aioredis.Redis] = None
+_listener_task: Optional[asyncio.Task] = None
+# Called with a user id from another worker's publish_user_invalidation,
+# or with None when messages may have been missed and everything should go
+_user_invalidation_handlers: list[Callable[[Optional[int]], None]] = []
+
+
+def _redis_key(group_id: int, user_id: int) -> str:
+    return f"role:{group_id}:{user_id}"
+
+
+async def get_cached_role(group_id: int, user_id: int) -> GroupRole | None:
+    role = _local_roles.get((group_id, user_id))
+    if role is not None or _redis is None:
+        return role
+
+    try:
+        raw = await _redis.get(_redis_key(group_id, user_id))
+    except Exception as e:
+        logger.warning(f"Membership cache unavailable for group {group_id}, user {user_id}: {e}")
+        return None
+    if raw is None:
+        return None
+
+    role = GroupRole(raw.decode())
+    _local_roles[(group_id, user_id)] = role
+    return role
+
+
+async def cache_role(group_id: int, user_id: int, role: GroupRole) -> None:
+    _local_roles[(group_id, user_id)] = role
+    if _redis is None:
+        return
+    try:
+        await _redis.set(_redis_key(group_id, user_id), role.value, ex=MEMBERSHIP_REDIS_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to cache membership for group {group_id}, user {user_id}: {e}")
+
+
+async def invalidate_cached_membership(group_id: int, *user_ids: int) -> None:
+    """Call after committing a role change or removal for these members of a group."""
+    for user_id in user_ids:
+        _local_roles.pop((group_id, user_id), None)
+    if _redis is None or not user_ids:
+        return
+    try:
+        await _redis.delete(*(_redis_key(group_id, user_id) for user_id in user_ids))
+        await _redis.publish(_INVALIDATION_CHANNEL, " ".join(f"{group_id}:{user_id}" for user_id in user_ids))
+    except Exception as e:
+        logger.warning(f"Failed to invalidate membership cache for group {group_id}, users {user_ids}: {e}")
+
+
+def on_user_invalidated(handler: Callable[[Optional[int]], None]) -> None:
+    """Registers a per-process cache to purge when any worker publishes a user invalidation."""
+    _user_invalidation_handlers.append(handler)
+
+
+def _notify_user_handlers(user_id: Optional[int]) -> None:
+    for handler in _user_invalidation_handlers:
+        handler(user_id)
+
+
+async def publish_user_invalidation(user_id: int) -> None:
+    """Call after committing a change to a user's row, once the local caches are purged."""
+    if _redis is None:
+        return
+    try:
+        await _redis.publish(_INVALIDATION_CHANNEL, f"user:{user_id}")
+    except Exception as e:
+        logger.warning(f"Failed to publish invalidation for user {user_id}: {e}")
+
+
+async def _listen_for_invalidations() -> None:
+    while True:
+        try:
+            async with _redis.pubsub() as pubsub:
+                await pubsub.subscribe(_INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    for entry in message["data"].decode().split():
+                        scope, user_id = entry.split(":")
+                        if scope == "user":
+                            _notify_user_handlers(int(user_id))
+                        else:
+                            _local_roles.pop((int(scope), int(user_id)), None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Messages may have been missed while disconnected
+            logger.warning(f"Membership invalidation listener lost its connection, retrying: {e}")
+            _local_roles.clear()
+            _notify_user_handlers(None)
+            await asyncio.sleep(1)
+
+
+async def start_membership_cache(redis: aioredis.Redis) -> None:
+    """Enables the Redis level and the cross-worker invalidation listener. The caller owns the client."""
+    global _redis, _listener_task
+    _redis = redis
+    _listener_task = asyncio.create_task(_listen_for_invalidations())
+
+
+async def stop_membership_cache() -> None:
+    global _redis, _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
+    _redis = None
@@ -0,0 +1,106 @@
+import asyncio
+from typing import AsyncIterator, Optional
+import orjson
+from redis import asyncio as aioredis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import backend.models as models
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Pushes each committed notification to its recipient's open streams.
+# Notifications are picked up from the session itself (after_flush), so every code path
+# that creates one is covered, and only published once its transaction commits.
+# Events go through Redis pub/sub so a stream on any instance receives them. Without
+# REDIS_URL streaming is off: in-process delivery would silently miss notifications
+# created on other instances.
+_PENDING_KEY = "pending_notification_events"
+
+_redis: Optional[aioredis.Redis] = None
+_publish_tasks: set[asyncio.Task] = set()
+
+
+def _channel(user_id: int) -> str:
+    return f"notifications:{user_id}"
+
+
+def _notification_event(notification: models.Notification) -> bytes:
+    return orjson.dumps({
+        "id": notification.id,
+        "recipient_user_id": notification.recipient_user_id,
+        "message": notification.message,
+        "is_read": bool(notification.is_read),
+        "created_at": notification.created_at,
+        "notification_type": notification.notification_type,
+        "related_group_id": notification.related_group_id,
+        "related_bill_id": notification.related_bill_id,
+        "related_payment_id": notification.related_payment_id,
+        "related_user_id": notification.related_user_id,
+    })
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_new_notifications(session: Session, flush_context) -> None:
+    if _redis is None:
+        return
+    # Ids are assigned by now; session.new still lists what this flush inserted
+    events = [
+        (obj.recipient_user_id, _notification_event(obj))
+        for obj in session.new if isinstance(obj, models.Notification)
+    ]
+    if events:
+        session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_notifications(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        task = asyncio.get_running_loop().create_task(_publish(events))
+        _publish_tasks.add(task)
+        task.add_done_callback(_publish_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_notifications(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+async def _publish(events: list[tuple[int, bytes]]) -> None:
+    if _redis is None:
+        return
+    try:
+        for user_id, payload in events:
+            await _redis.publish(_channel(user_id), payload)
+    except Exception as e:
+        logger.warning(f"Failed to publish notification events: {e}")
+
+
+def is_streaming_enabled() -> bool:
+    return _redis is not None
+
+
+async def subscribe(user_id: int, idle_seconds: float) -> AsyncIterator[Optional[bytes]]:
+    """
+    Yields the JSON of each notification created for the user while subscribed,
+    and None after idle_seconds without one so the caller can send a keep-alive.
+    Only call while is_streaming_enabled().
+    """
+    async with _redis.pubsub() as pubsub:
+        await pubsub.subscribe(_channel(user_id))
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=idle_seconds)
+            yield message["data"] if message else None
+
+
+async def start_notification_stream(redis: aioredis.Redis) -> None:
+    """Routes notification events through Redis so streams on every worker receive them. The caller owns the client."""
+    global _redis
+    _redis = redis
+
+
+async def stop_notification_stream() -> None:
+    global _redis
+    _redis = None
@@ -1,5 +1,6 @@
 import os
 import uuid
+import asyncio
 from fastapi import UploadFile, HTTPException, status
 from google.cloud import storage
 from google.api_core import exceptions as google_exceptions
@@ -31,6 +32,9 @@ except Exception as e:
     logger.exception(f"An unexpected error occurred during GCS client initialization: {e}")
     raise
 
+# Larger uploads go through resumable upload in chunks of this size (must be a multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE_BYTES = 8 * 1024 * 1024
+
 
 async def upload_file_to_gcs(file: UploadFile, destination_path: str = "profile_images") -> str:
     """
@@ -54,15 +58,16 @@ async def upload_file_to_gcs(file: UploadFile, destination_path: str = "profile_
     unique_filename = f"{uuid.uuid4()}{file_extension}"
     blob_name = f"{destination_path}/{unique_filename}"
     
-    blob = bucket.blob(blob_name)
+    blob = bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE_BYTES)
 
     try:
-        # Read the file content into memory
-        contents = await file.read()
-        
-        # Upload the file
-        blob.upload_from_string(
-            contents,
+        # Stream from the spooled upload file instead of reading it all into memory.
+        # The GCS client is blocking, so it runs in a worker thread.
+        await file.seek(0)
+        await asyncio.to_thread(
+            blob.upload_from_file,
+            file.file,
+            size=file.size,
             content_type=file.content_type
         )
         